@@ -1,5 +1,7 @@
 # email_blast/config.py
 
+from functools import lru_cache
+
 from pydantic.v1 import BaseSettings, SecretStr, EmailStr
 
 
@@ -16,8 +18,10 @@ class Settings(BaseSettings):
             EMAIL_SUBJECT (str): Subject of the email.
             EMAIL_BODY_TEMPLATE (str): Template of the email body with a personalized message and link.
             PROGRESS_BAR_DESC (str): Description for the progress bar during email sending.
-            MAX_CONCURRENT_EMAILS (int): Maximum number of concurrent email sends.
-            SLEEP_DURATION (int): Waiting time between email sends (in seconds).
+            PROGRESS_BAR_MININTERVAL (float): Minimum interval between progress bar redraws in seconds.
+            MAX_CONCURRENT_EMAILS (int): Maximum number of concurrent email sends (parallel SMTP sessions).
+            MAX_EMAILS_PER_SECOND (float): Maximum sending rate in emails per second (0 disables the limit).
+            RECIPIENTS_QUEUE_SIZE (int): Maximum number of read recipients waiting to be sent.
 
         Configuration:
             env_file (str): Name of the environment variables file.
@@ -29,8 +33,10 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: SecretStr                     # Секретный пароль пользователя SMTP (строка, скрытая при выводе)
     CSV_FILENAME: str = 'recipients.csv'         # Имя файла с получателями (CSV)
     PROGRESS_BAR_DESC: str = 'Sending emails'    # Описание для прогресс-бара при отправке писем
+    PROGRESS_BAR_MININTERVAL: float = 0.5        # Минимальный интервал между перерисовками прогресс-бара (в секундах)
     MAX_CONCURRENT_EMAILS: int = 5               # Максимальное количество одновременных отправок писем
-    SLEEP_DURATION: int = 2                      # Время ожидания между отправками писем (в секундах)
+    MAX_EMAILS_PER_SECOND: float = 5.0           # Максимальная скорость отправки писем в секунду (0 - без ограничения)
+    RECIPIENTS_QUEUE_SIZE: int = 1024            # Максимальное количество прочитанных получателей в очереди на отправку
     # Тема электронного письма
     EMAIL_SUBJECT: str = 'Ваша персонализированная ссылка'
     # Шаблон тела письма с персонализированным сообщением и ссылкой
@@ -41,5 +47,15 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
 
 
-# Создаем экземпляр класса Settings для хранения конфигурационных данных
-config: Settings = Settings()
+@lru_cache(maxsize=1)
+def get_config() -> Settings:
+    """
+        Returns the application configuration.
+
+        The Settings object (and the .env file) is loaded on the first call only and cached afterwards, so importing
+        modules of the application does not require SMTP credentials.
+
+        Returns:
+            Settings: The application configuration.
+    """
+    return Settings()
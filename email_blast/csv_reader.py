@@ -1,56 +1,118 @@
 # email_blast/csv_reader.py
 
-import csv
-from typing import List, Dict
+from typing import AsyncIterator, Dict, Iterable, Tuple
 
 import aiofiles
+from aiocsv import AsyncDictReader
+
+try:
+    # Необязательный парсер на Rust: разбирает CSV вне GIL и не блокирует цикл событий
+    from rapcsv import Reader
+except ImportError:
+    Reader = None
 
 
 class CSVReader:
     """
         Class for reading data from a CSV file.
 
+        Attributes:
+            REQUIRED_COLUMNS (Tuple[str, ...]): Columns that must be present in the CSV header.
+
         Methods:
-            async read_recipients(filename: str) -> List[Dict[str, str]]:
-                Asynchronously reads data from a CSV file and returns a list of dictionaries with recipient data.
+            async read_recipients(filename: str) -> AsyncIterator[Dict[str, str]]:
+                Asynchronously reads a CSV file row by row and yields dictionaries with recipient data.
+
+        Notes:
+            Uses the Rust-backed rapcsv parser when it is installed and falls back to aiofiles + aiocsv otherwise.
     """
+    REQUIRED_COLUMNS: Tuple[str, ...] = ('email', 'name', 'link')
+
     @staticmethod
-    async def read_recipients(filename: str) -> List[Dict[str, str]]:
+    def check_columns(fieldnames: Iterable[str]) -> None:
         """
-            Asynchronously reads data from a CSV file and returns a list of dictionaries with recipient data.
+            Checks that the CSV header contains all required columns.
+
+            Args:
+                fieldnames (Iterable[str]): Column names from the CSV header.
+
+            Raises:
+                ValueError: If the header is empty or doesn't contain the required columns.
+        """
+        # Проверяем, пуст ли файл
+        if not fieldnames:
+            raise ValueError("The CSV file is empty or invalid.")
+
+        # Определяем отсутствующие столбцы
+        missing_columns = set(CSVReader.REQUIRED_COLUMNS) - set(fieldnames)
+        if missing_columns:
+            # Вызываем исключение ValueError с информацией о пропущенных столбцах
+            raise ValueError(f"Missing required columns in CSV: {', '.join(missing_columns)}")
+
+    @staticmethod
+    async def _read_rows_rapcsv(filename: str) -> AsyncIterator[Tuple[str, str, str]]:
+        """
+            Reads (email, name, link) values from a CSV file using the rapcsv parser.
 
             Args:
                 filename (str): Name of the CSV file.
 
-            Returns:
-                List[Dict[str, str]]: List of dictionaries with recipient data (email, name, link).
+            Yields:
+                Tuple[str, str, str]: Raw email, name and link values of a row.
+        """
+        async with Reader(filename) as reader:
+            # Первая строка - заголовок, по нему определяем позиции нужных столбцов
+            header = await reader.read_row()
+            CSVReader.check_columns(header)
+            email_ix, name_ix, link_ix = (header.index(column) for column in CSVReader.REQUIRED_COLUMNS)
 
-            Raises:
-                ValueError: If the CSV file is empty or doesn't contain the required columns.
+            # Пустой список означает конец файла
+            while row := await reader.read_row():
+                yield row[email_ix], row[name_ix], row[link_ix]
+
+    @staticmethod
+    async def _read_rows_aiocsv(filename: str) -> AsyncIterator[Tuple[str, str, str]]:
+        """
+            Reads (email, name, link) values from a CSV file using aiofiles and aiocsv.
+
+            Args:
+                filename (str): Name of the CSV file.
+
+            Yields:
+                Tuple[str, str, str]: Raw email, name and link values of a row.
         """
         # Открываем CSV-файл асинхронно для чтения
         async with aiofiles.open(filename, mode='r', encoding='utf-8', newline='') as csvfile:
-            # Читаем содержимое файла
-            content = await csvfile.read()
-            # Создаем объект DictReader для чтения CSV-данных в виде словаря
-            reader = csv.DictReader(content.splitlines())
-
-            # Проверяем, пуст ли файл
-            if not reader.fieldnames:
-                raise ValueError("The CSV file is empty or invalid.")
-
-            # Определяем необходимые столбцы
-            required_columns = {'email', 'name', 'link'}
-            # Проверяем, содержит ли файл все необходимые столбцы
-            if not required_columns.issubset(reader.fieldnames):
-                # Определяем отсутствующие столбцы
-                missing_columns = required_columns - set(reader.fieldnames)
-                # Вызываем исключение ValueError с информацией о пропущенных столбцах
-                raise ValueError(f"Missing required columns in CSV: {', '.join(missing_columns)}")
-
-            # Формируем список словарей с данными получателей, очищая значения от лишних пробелов
-            return [{
-                'email': row['email'].strip(),
-                'name': row['name'].strip(),
-                'link': row['link'].strip()
-            } for row in reader]
+            # Создаем объект AsyncDictReader для потокового чтения CSV-данных в виде словаря
+            reader = AsyncDictReader(csvfile)
+            CSVReader.check_columns(await reader.get_fieldnames())
+
+            async for row in reader:
+                yield row['email'], row['name'], row['link']
+
+    @staticmethod
+    async def read_recipients(filename: str) -> AsyncIterator[Dict[str, str]]:
+        """
+            Asynchronously reads a CSV file row by row and yields dictionaries with recipient data.
+
+            The file is parsed as a stream, so only the current row is kept in memory.
+
+            Args:
+                filename (str): Name of the CSV file.
+
+            Yields:
+                Dict[str, str]: Dictionary with recipient data (email, name, link).
+
+            Raises:
+                ValueError: If the CSV file is empty or doesn't contain the required columns.
+        """
+        # Выбираем парсер: rapcsv, если он установлен, иначе aiocsv
+        rows = CSVReader._read_rows_rapcsv(filename) if Reader is not None else CSVReader._read_rows_aiocsv(filename)
+
+        # Построчно отдаем словари с данными получателей, очищая значения от лишних пробелов
+        async for email, name, link in rows:
+            yield {
+                'email': email.strip(),
+                'name': name.strip(),
+                'link': link.strip()
+            }
@@ -3,28 +3,29 @@
 import asyncio
 import smtplib
 import traceback
-from asyncio import Semaphore
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from typing import List, Dict, AsyncIterator
+from typing import List, Dict, AsyncIterable, AsyncIterator, Optional
 
 from tqdm import tqdm
 
-from config import config
+from config import get_config
 from email_template import EmailTemplate
 from logger_config import logger
+from rate_limiter import RateLimiter
 
 
-@asynccontextmanager
-async def get_smtp_connection() -> AsyncIterator[smtplib.SMTP]:
+def open_smtp_connection() -> smtplib.SMTP:
     """
-       Context manager for establishing and automatically closing a connection to an SMTP server.
+        Establishes an authenticated connection to the SMTP server.
 
-       Yields:
-           smtplib.SMTP: An SMTP server object for sending emails.
+        Returns:
+            smtplib.SMTP: An SMTP server object with TLS started and the user logged in.
 
-       Raises:
-           Exception: If there's an error connecting to or authenticating with the SMTP server.
+        Raises:
+            Exception: If there's an error connecting to or authenticating with the SMTP server.
     """
+    config = get_config()
     logger.info(f"Connecting to SMTP server: {config.SMTP_SERVER}:{config.SMTP_PORT}")
     # Инициализируем SMTP соединение с сервером, указанным в конфигурации.
     server = smtplib.SMTP(config.SMTP_SERVER, config.SMTP_PORT)
@@ -37,93 +38,336 @@ async def get_smtp_connection() -> AsyncIterator[smtplib.SMTP]:
         logger.info(f"Logging in as {config.SMTP_USER}")
         server.login(config.SMTP_USER, config.SMTP_PASSWORD.get_secret_value())
 
-        # Устанавливаем успешное соединение с SMTP-сервером и передаём управление далее.
-        logger.info("SMTP connection established")
-        yield server
+    # В случае ошибки закрываем сокет, чтобы не оставлять полуоткрытое соединение.
+    except Exception:
+        server.close()
+        raise
+
+    logger.info("SMTP connection established")
+    return server
+
+
+def close_smtp_connection(server: smtplib.SMTP) -> None:
+    """
+        Gracefully closes a connection to the SMTP server.
+
+        Args:
+            server (smtplib.SMTP): The SMTP server object to close.
+    """
+    try:
+        server.quit()
+    except smtplib.SMTPException:
+        # Если сервер уже разорвал соединение, просто закрываем сокет.
+        server.close()
+
+
+@asynccontextmanager
+async def get_smtp_pool(size: int, executor: ThreadPoolExecutor) -> AsyncIterator[List[smtplib.SMTP]]:
+    """
+       Context manager for establishing and automatically closing a pool of connections to an SMTP server.
+
+       Connections are opened in parallel in the given executor, so TLS handshakes and authentication
+       are paid once per connection rather than once per email.
+       If the caller is cancelled while the connections are being opened, the ones that get established are
+       closed before the cancellation is propagated.
+
+       Args:
+           size (int): Number of parallel SMTP sessions to open.
+           executor (ThreadPoolExecutor): Executor used to run blocking smtplib calls.
+
+       Yields:
+           List[smtplib.SMTP]: A list of authenticated SMTP server objects.
 
-    # В случае возникновения исключения логируем ошибку подключения к SMTP-серверу.
-    except Exception as e:
-        detailed_error_message = traceback.format_exc()
-        logger.error(f"Failed to connect to SMTP server: {str(e)}\n{detailed_error_message}")
+       Raises:
+           Exception: If there's an error connecting to or authenticating with the SMTP server.
+    """
+    loop = asyncio.get_running_loop()
+    # Открываем все соединения параллельно, не блокируя цикл событий.
+    connecting = asyncio.gather(*(loop.run_in_executor(executor, open_smtp_connection) for _ in range(size)),
+                                return_exceptions=True)
+    try:
+        # shield не дает отмене прервать ожидание подключений, которые уже выполняются в потоках
+        results = await asyncio.shield(connecting)
+    except asyncio.CancelledError:
+        # Если открытие пула отменено (например, чтение CSV-файла завершилось ошибкой), дожидаемся начатых
+        # подключений и закрываем установленные соединения, чтобы они не остались открытыми.
+        results = await connecting
+        await asyncio.gather(*(loop.run_in_executor(executor, close_smtp_connection, server)
+                               for server in results if isinstance(server, smtplib.SMTP)))
         raise
+    pool = [server for server in results if isinstance(server, smtplib.SMTP)]
+    try:
+        # Если хотя бы одно соединение не удалось установить, логируем ошибку и прерываем работу.
+        errors = [error for error in results if isinstance(error, BaseException)]
+        if errors:
+            detailed_error_message = "".join(traceback.format_exception(errors[0]))
+            logger.error(f"Failed to connect to SMTP server: {str(errors[0])}\n{detailed_error_message}")
+            raise errors[0]
+
+        yield pool
 
-    # Независимо от результата операции, закрываем соединение с SMTP-сервером.
+    # Независимо от результата операции, закрываем все соединения с SMTP-сервером.
     finally:
-        logger.info("Closing SMTP connection")
-        server.quit()
+        logger.info(f"Closing {len(pool)} SMTP connection(s)")
+        await asyncio.gather(*(loop.run_in_executor(executor, close_smtp_connection, server) for server in pool))
+
+
+async def fill_queue(queue: asyncio.Queue, recipients: AsyncIterable[Dict[str, str]]) -> None:
+    """
+        Puts recipients into a queue as they are read and then a None stop marker.
+
+        The queue is bounded, so reading pauses while the senders are behind.
+
+        Args:
+            queue (asyncio.Queue): Queue consumed by EmailService.send_from_queue.
+            recipients (AsyncIterable[Dict[str, str]]): Stream of dictionaries containing recipient email, name,
+                and link (e.g. CSVReader.read_recipients).
+    """
+    async for email_data in recipients:
+        await queue.put(email_data)
+    await queue.put(None)
 
 
 class EmailService:
     """
         The EmailService class provides methods for sending personalized emails via an SMTP server.
 
+        Attributes:
+            max_concurrent (int): Number of parallel SMTP sessions opened for a batch.
+            rate_limiter (RateLimiter): Limiter of the overall sending rate.
+
         Methods:
-            async def send_emails(email_list: List[Dict[str, str]], max_concurrent: int = config.MAX_CONCURRENT_EMAILS) -> None:
-                Asynchronously sends emails from the email_list using an SMTP server.
+            async def send_emails(recipients: AsyncIterable[Dict[str, str]]) -> None:
+                Asynchronously sends emails to the recipients using a pool of SMTP sessions.
+
+            async def send_from_queue(queue: asyncio.Queue) -> None:
+                Sends emails to the recipients taken from a queue until a stop marker is received.
+
+            async def set_max_concurrent(limit: int) -> None:
+                Changes the number of emails that may be sent simultaneously while a batch is running.
+
+            deliver(server: smtplib.SMTP, recipient_email: str, message: bytes) -> None:
+                Sends a single message over an already established SMTP session.
 
         Notes:
-            Utilizes asyncio for managing parallel email sending and tracks progress using tqdm progress bar.
+            Utilizes an asyncio.Queue consumed by one worker per SMTP session, an asyncio.Condition-based admission
+            counter for adjustable concurrency, a RateLimiter for the sending rate and tracks progress using tqdm
+            progress bar.
     """
+    def __init__(self, max_concurrent: Optional[int] = None, rate_limit: Optional[float] = None) -> None:
+        """
+            Initializes EmailService with the specified number of parallel SMTP sessions and sending rate.
+
+            Args:
+                max_concurrent (int, optional): Number of parallel SMTP sessions. Defaults to
+                    config.MAX_CONCURRENT_EMAILS.
+                rate_limit (float, optional): Maximum number of emails per second. Defaults to
+                    config.MAX_EMAILS_PER_SECOND.
+        """
+        config = get_config()
+        if max_concurrent is None:
+            max_concurrent = config.MAX_CONCURRENT_EMAILS
+        if rate_limit is None:
+            rate_limit = config.MAX_EMAILS_PER_SECOND
+
+        self.max_concurrent = max_concurrent         # Количество параллельных SMTP-сессий
+        self.rate_limiter = RateLimiter(rate_limit)  # Ограничитель скорости отправки писем
+        self._cmax = max_concurrent           # Текущий лимит одновременных отправок
+        self._active = 0                      # Количество отправок, выполняющихся в данный момент
+        self._cond = asyncio.Condition()      # Условие для ожидания свободного слота отправки
+
+    async def set_max_concurrent(self, limit: int) -> None:
+        """
+            Changes the number of emails that may be sent simultaneously while a batch is running.
+
+            Lowering the limit lets in-flight sends finish and holds back new ones; raising it wakes up waiting
+            workers. The effective limit never exceeds the number of open SMTP sessions.
+
+            Args:
+                limit (int): New maximum number of simultaneous sends.
+
+            Raises:
+                ValueError: If the limit is less than 1.
+        """
+        if limit < 1:
+            raise ValueError("The concurrency limit must be at least 1.")
+
+        async with self._cond:
+            raised = limit > self._cmax
+            self._cmax = limit
+            # При увеличении лимита будим всех ожидающих воркеров
+            if raised:
+                self._cond.notify_all()
+        logger.info(f"Email sending concurrency limit set to {limit}")
+
+    @asynccontextmanager
+    async def _admit(self) -> AsyncIterator[None]:
+        """
+            Context manager that holds one of the sending slots allowed by the current concurrency limit.
+        """
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self._cmax)
+            self._active += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._active -= 1
+                self._cond.notify(1)
+
     @staticmethod
-    async def send_emails(email_list: List[Dict[str, str]], max_concurrent: int = config.MAX_CONCURRENT_EMAILS) -> None:
+    def deliver(server: smtplib.SMTP, recipient_email: str, message: bytes) -> None:
+        """
+            Sends a single message over an already established SMTP session.
+
+            The MAIL/RCPT/DATA commands are issued directly and the session is reset with RSET afterwards,
+            so the same connection can be reused for the next message without a new handshake.
+
+            Args:
+                server (smtplib.SMTP): An authenticated SMTP server object.
+                recipient_email (str): Email address of the recipient.
+                message (bytes): Serialized message to send.
+
+            Raises:
+                smtplib.SMTPServerDisconnected: If the server has closed the connection.
+                smtplib.SMTPException: If the server rejects the sender, the recipient or the message.
+        """
+        sender = get_config().SMTP_USER
+        try:
+            # Тело письма передается в 8bit, поэтому объявляем BODY=8BITMIME, если сервер его поддерживает
+            options = ['BODY=8BITMIME'] if server.has_extn('8bitmime') else []
+            code, response = server.mail(sender, options)
+            if code != 250:
+                raise smtplib.SMTPSenderRefused(code, response, sender)
+
+            code, response = server.rcpt(recipient_email)
+            if code not in (250, 251):
+                raise smtplib.SMTPRecipientsRefused({recipient_email: (code, response)})
+
+            code, response = server.data(message)
+            if code != 250:
+                raise smtplib.SMTPDataError(code, response)
+        finally:
+            # Сбрасываем состояние транзакции, чтобы сессия была готова к следующему письму. Если соединение уже
+            # разорвано, RSET не отправляем, чтобы ошибка разрыва не подменила исходную ошибку (разорванная сессия
+            # будет переоткрыта при следующей отправке)
+            if server.sock is not None:
+                try:
+                    server.rset()
+                except smtplib.SMTPServerDisconnected:
+                    pass
+
+    async def send_emails(self, recipients: AsyncIterable[Dict[str, str]]) -> None:
         """
-            Asynchronously sends emails from a list through an SMTP server.
+            Asynchronously sends emails to the recipients through a pool of SMTP sessions.
 
             Args:
-                email_list (List[Dict[str, str]]): A list of dictionaries containing recipient email, name, and link.
-                max_concurrent (int, optional): Maximum number of concurrent email sending tasks. Defaults to config.MAX_CONCURRENT_EMAILS.
+                recipients (AsyncIterable[Dict[str, str]]): Stream of dictionaries containing recipient email, name,
+                    and link (e.g. CSVReader.read_recipients).
 
             Raises:
-                Exception: If there's an error sending an email.
+                Exception: If there's an error reading the recipients or connecting to the SMTP server.
 
             Notes:
-                Uses asyncio to manage concurrent sending of emails and tracks progress with a tqdm progress bar.
+                Reading recipients and sending run as two concurrent tasks connected by an asyncio.Queue of
+                config.RECIPIENTS_QUEUE_SIZE recipients (see fill_queue and send_from_queue), so the SMTP pool is
+                opened while the file is still being read.
+        """
+        # Ограниченная очередь получателей между чтением и отправкой
+        queue: asyncio.Queue[Optional[Dict[str, str]]] = asyncio.Queue(maxsize=get_config().RECIPIENTS_QUEUE_SIZE)
+
+        producer = asyncio.create_task(fill_queue(queue, recipients))
+        consumer = asyncio.create_task(self.send_from_queue(queue))
+        try:
+            await asyncio.gather(producer, consumer)
+        finally:
+            # Если одна из задач завершилась ошибкой, останавливаем вторую, чтобы она не ждала бесконечно
+            producer.cancel()
+            consumer.cancel()
+            await asyncio.gather(producer, consumer, return_exceptions=True)
+
+    async def send_from_queue(self, queue: asyncio.Queue) -> None:
         """
-        # Создаем семафор для управления количеством одновременных асинхронных задач отправки писем
-        semaphore = Semaphore(max_concurrent)
-
-        # Устанавливаем соединение с SMTP-сервером через контекстный менеджер
-        async with get_smtp_connection() as server:
-            # Инициализируем прогресс-бар для отслеживания отправки писем
-            progress_bar = tqdm(total=len(email_list), desc=config.PROGRESS_BAR_DESC, leave=True)
-
-            async def send_email(email_data: Dict[str, str]) -> None:
-                """
-                    Asynchronously sends an email based on data from email_data dictionary.
-
-                    Args:
-                        email_data (Dict[str, str]): Dictionary containing email, name, and link.
-
-                    Raises:
-                        Exception: If there's an error sending an email.
-                """
-                # Асинхронно захватываем семафор для ограничения количества одновременных задач отправки
-                async with semaphore:
-                    try:
-                        # Извлекаем данные получателя из словаря email_data
-                        recipient_email = email_data['email']
-                        recipient_name = email_data['name']
-                        link = email_data['link']
-
-                        # Создаем объект письма с помощью шаблона EmailTemplate
-                        msg = EmailTemplate.create_email(recipient_email, recipient_name, link)
-                        # Отправляем письмо через SMTP-сервер
-                        server.sendmail(config.SMTP_USER, recipient_email, msg.as_string())
-                        logger.info(f"Email sent successfully to {recipient_email}")
-                    except Exception as e:
-                        # Логируем ошибку, если не удалось отправить письмо
-                        logger.error(f"Error sending email to {recipient_email}: {str(e)}", exc_info=True)
-                    finally:
-                        # Обновляем прогресс-бар и ожидаем указанное время перед следующей отправкой
-                        progress_bar.update(1)
-                        await asyncio.sleep(config.SLEEP_DURATION)
-
-            # Создаем задачи для отправки каждого письма в списке email_list
-            tasks = [asyncio.create_task(send_email(email_data)) for email_data in email_list]
-            # Собираем все задачи вместе для асинхронного выполнения
-            await asyncio.gather(*tasks, return_exceptions=True)
-            # Закрываем прогресс-бар после завершения отправки
-            progress_bar.close()
+            Sends emails to the recipients taken from a queue through a pool of SMTP sessions.
+
+            The SMTP pool is opened as soon as the method starts, so connections are established while the queue is
+            still being filled. Sending stops when a None stop marker is taken from the queue.
+
+            Args:
+                queue (asyncio.Queue): Queue of dictionaries containing recipient email, name and link, terminated by
+                    None (e.g. filled by fill_queue).
+
+            Raises:
+                Exception: If there's an error connecting to the SMTP server.
+
+            Notes:
+                Each SMTP session is served by its own worker that pulls recipients from the shared queue; blocking
+                smtplib calls run in a thread pool so the event loop stays responsive.
+                A session closed by the server is reopened by its worker.
+        """
+        loop = asyncio.get_running_loop()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
+            # Открываем пул SMTP-соединений через контекстный менеджер
+            async with get_smtp_pool(self.max_concurrent, executor) as pool:
+                # Инициализируем прогресс-бар для отслеживания отправки писем; перерисовываем его не чаще, чем раз в
+                # PROGRESS_BAR_MININTERVAL секунд, чтобы update(1) для каждого письма почти ничего не стоил
+                config = get_config()
+                progress_bar = tqdm(desc=config.PROGRESS_BAR_DESC, leave=True,
+                                    mininterval=config.PROGRESS_BAR_MININTERVAL)
+
+                async def worker(index: int) -> None:
+                    """
+                        Sends emails taken from the queue over a single SMTP session until a stop marker is received.
+
+                        If the server closes the session, a new one is opened in its place in the pool (so it is
+                        still closed with the pool) and the email is sent once more.
+
+                        Args:
+                            index (int): Index of the SMTP session in the pool owned by this worker.
+                    """
+                    while (email_data := await queue.get()) is not None:
+                        recipient_email = email_data.get('email')
+                        try:
+                            # Формируем байты письма с помощью шаблона EmailTemplate
+                            msg = EmailTemplate.create_email(recipient_email, email_data['name'], email_data['link'])
+                            # Ожидаем свободный слот и разрешение ограничителя скорости, затем отправляем письмо
+                            # через SMTP-сессию в пуле потоков
+                            async with self._admit():
+                                await self.rate_limiter.acquire()
+                                try:
+                                    await loop.run_in_executor(executor, self.deliver, pool[index], recipient_email,
+                                                               msg)
+                                except smtplib.SMTPServerDisconnected as e:
+                                    # Сервер разорвал сессию: открываем новую вместо нее и повторяем отправку
+                                    logger.warning(f"SMTP session {index} disconnected ({str(e)}), reconnecting")
+                                    pool[index] = await loop.run_in_executor(executor, open_smtp_connection)
+                                    await self.rate_limiter.acquire()
+                                    await loop.run_in_executor(executor, self.deliver, pool[index], recipient_email,
+                                                               msg)
+                            logger.info(f"Email sent successfully to {recipient_email}")
+                        except Exception as e:
+                            # Логируем ошибку, если не удалось отправить письмо
+                            logger.error(f"Error sending email to {recipient_email}: {str(e)}", exc_info=True)
+                        finally:
+                            # Обновляем прогресс-бар
+                            progress_bar.update(1)
+
+                    # Возвращаем маркер остановки в очередь для остальных воркеров
+                    queue.put_nowait(None)
+
+                # Запускаем по одному воркеру на каждое SMTP-соединение
+                workers = [asyncio.create_task(worker(index)) for index in range(len(pool))]
+
+                try:
+                    await asyncio.gather(*workers)
+                finally:
+                    # Если отправка прервана, останавливаем воркеров
+                    for task in workers:
+                        task.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+                    # Закрываем прогресс-бар после завершения отправки
+                    progress_bar.close()
 
         # Логируем завершение отправки всех писем
-        logger.info(f"All emails have been processed. Total: {len(email_list)}")
+        logger.info(f"All emails have been processed. Total: {progress_bar.n}")
@@ -1,10 +1,74 @@
 # email_blast/email_template.py
 
-from email.mime.multipart import MIMEMultipart
+import re
+from email.charset import Charset
+from email.header import Header
 from email.mime.text import MIMEText
+from email.policy import compat32
+from functools import lru_cache
+from typing import Tuple
 
-from config import config
-from logger_config import logger
+from config import get_config
+
+# Маркеры, которые подставляются вместо персональных данных в предварительно закодированный шаблон
+TO_MARKER: bytes = b"\x00TO\x00"
+NAME_MARKER: bytes = b"\x00NAME\x00"
+LINK_MARKER: bytes = b"\x00LINK\x00"
+
+# Любой перевод строки (CRLF, одиночный CR или LF) в подставляемых значениях
+LINE_BREAK_RE = re.compile(r'\r\n|\r|\n')
+
+
+@lru_cache(maxsize=1)
+def get_templates() -> Tuple[bytes, bytes]:
+    """
+        Encodes the email headers and body template once and caches the result.
+
+        The message is built as a single-part MIMEText (no multipart container) and serialized once; per recipient
+        only the markers are replaced.
+
+        Returns:
+            Tuple[bytes, bytes]: Header block with the recipient marker and UTF-8 body with name and link markers,
+                both with CRLF line endings.
+    """
+    config = get_config()
+
+    # Кодировка тела письма: UTF-8 без base64/quoted-printable (передается как 8bit)
+    charset = Charset('utf-8')
+    charset.body_encoding = None
+
+    # Одночастное письмо text/plain (без контейнера multipart) с маркерами вместо персональных данных
+    msg = MIMEText(config.EMAIL_BODY_TEMPLATE.format(name=NAME_MARKER.decode('ascii'), link=LINK_MARKER.decode('ascii')),
+                   'plain', charset)
+    msg['From'] = config.SMTP_USER
+    msg['To'] = TO_MARKER.decode('ascii')
+    msg['Subject'] = Header(config.EMAIL_SUBJECT, 'utf-8')
+
+    # Сериализуем письмо один раз с окончаниями строк CRLF и разделяем его на заголовки и тело
+    header_template, body_template = msg.as_bytes(policy=compat32.clone(linesep='\r\n')).split(b"\r\n\r\n", 1)
+    header_template += b"\r\n\r\n"
+    return header_template, body_template
+
+
+@lru_cache(maxsize=4096)
+def render_body(recipient_name: str, link: str) -> bytes:
+    """
+        Renders the email body for the given name and link.
+
+        The result is cached, so recipients repeating the same (name, link) pair reuse the already encoded body.
+        Line breaks inside the name or link (multi-line quoted CSV fields) are converted to CRLF, since the body is
+        passed to SMTP DATA as bytes and smtplib does not normalize bare CR or LF in it.
+
+        Args:
+            recipient_name (str): Name of the recipient.
+            link (str): Link to include in the email.
+
+        Returns:
+            bytes: UTF-8 body of the email with CRLF line endings.
+    """
+    _, body_template = get_templates()
+    return (body_template.replace(NAME_MARKER, LINE_BREAK_RE.sub('\r\n', recipient_name).encode('utf-8'))
+            .replace(LINK_MARKER, LINE_BREAK_RE.sub('\r\n', link).encode('utf-8')))
 
 
 class EmailTemplate:
@@ -12,13 +76,17 @@ class EmailTemplate:
         Class for creating an email template.
 
         Methods:
-            create_email(recipient_email: str, recipient_name: str, link: str) -> MIMEMultipart:
-                Creates a MIMEMultipart object for an email with the specified parameters.
+            create_email(recipient_email: str, recipient_name: str, link: str) -> bytes:
+                Creates a ready-to-send email message with the specified parameters.
+
+        Notes:
+            Headers and body are encoded once on first use; per recipient only the markers are replaced, and bodies
+            are cached by (name, link).
     """
     @staticmethod
-    def create_email(recipient_email: str, recipient_name: str, link: str) -> MIMEMultipart:
+    def create_email(recipient_email: str, recipient_name: str, link: str) -> bytes:
         """
-            Creates a MIMEMultipart object for an email with the specified parameters.
+            Creates a ready-to-send email message with the specified parameters.
 
             Args:
                 recipient_email (str): Email address of the recipient.
@@ -26,30 +94,17 @@ class EmailTemplate:
                 link (str): Link to include in the email.
 
             Returns:
-                MIMEMultipart: Configured MIMEMultipart object with headers and email body text.
-        """
+                bytes: Serialized message (headers and UTF-8 plain text body) that can be passed to SMTP DATA.
 
-        # Создаем объект MIMEMultipart для формирования электронного письма
-        msg = MIMEMultipart()
-
-        # Устанавливаем отправителя письма (берем из конфигурационных данных)
-        msg['From'] = config.SMTP_USER
-
-        # Устанавливаем адрес получателя письма
-        msg['To'] = recipient_email
-
-        # Устанавливаем тему письма
-        msg['Subject'] = config.EMAIL_SUBJECT
-
-        # Создаем тело письма с персонализированным сообщением и ссылкой
-        body = config.EMAIL_BODY_TEMPLATE.format(name=recipient_name, link=link)
-
-        # Прикрепляем текстовое тело письма к объекту MIMEMultipart
-        msg.attach(MIMEText(body, 'plain'))
+            Raises:
+                ValueError: If the recipient email contains a line break (it would inject extra headers).
+        """
+        # Адрес подставляется в заголовок To без разбора, поэтому перевод строки в нем добавил бы в письмо чужие
+        # заголовки
+        if '\r' in recipient_email or '\n' in recipient_email:
+            raise ValueError(f"Invalid recipient email with a line break: {recipient_email!r}")
 
-        # Добавим проверку
-        if msg['To'] != recipient_email:
-            logger.warning(f"Mismatch in recipient email: {msg['To']} != {recipient_email}")
+        header_template, _ = get_templates()
 
-        # Возвращаем готовый объект MIMEMultipart, содержащий все необходимые данные для отправки письма
-        return msg
+        # Подставляем адрес получателя в заголовки и добавляем тело письма (из кэша для повторяющихся имени и ссылки)
+        return header_template.replace(TO_MARKER, recipient_email.encode('utf-8')) + render_body(recipient_name, link)
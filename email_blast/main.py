@@ -3,7 +3,7 @@
 import asyncio
 import traceback
 
-from config import config
+from config import get_config
 from csv_reader import CSVReader
 from email_service import EmailService
 from logger_config import logger
@@ -18,15 +18,16 @@ async def main() -> None:
              Exception: If there's an unexpected error during the process.
      """
     try:
-        # Читаем информацию о получателях из CSV-файла
-        email_list = await CSVReader.read_recipients(config.CSV_FILENAME)
-        logger.info(f"Read recipients: {email_list}")
+        config = get_config()
+
+        # Открываем потоковое чтение информации о получателях из CSV-файла
+        recipients = CSVReader.read_recipients(config.CSV_FILENAME)
 
         # Логируем начало отправки писем
-        logger.info(f"Starting to send emails to {len(email_list)} recipients")
+        logger.info(f"Starting to send emails to recipients from {config.CSV_FILENAME}")
 
-        # Отправляем письма получателям с использованием класса EmailService
-        await EmailService.send_emails(email_list)
+        # Читаем файл и отправляем письма параллельно: SMTP-соединения открываются, пока файл еще читается
+        await EmailService().send_emails(recipients)
 
         # Логируем завершение отправки писем
         logger.info("Finished sending emails")
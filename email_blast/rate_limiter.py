@@ -0,0 +1,48 @@
+# email_blast/rate_limiter.py
+
+import asyncio
+from time import monotonic
+
+
+class RateLimiter:
+    """
+        Class for limiting the rate of operations to a fixed number per second.
+
+        Every call to acquire() reserves the next free time slot; slots are spaced 1 / rate seconds apart,
+        so the rate does not depend on how many coroutines are calling acquire() concurrently.
+
+        Attributes:
+            rate (float): Maximum number of operations per second. Zero or a negative value disables the limit.
+
+        Methods:
+            async acquire() -> None:
+                Waits until the next operation is allowed.
+    """
+
+    def __init__(self, rate: float) -> None:
+        """
+            Initializes RateLimiter with the specified rate.
+
+            Args:
+                rate (float): Maximum number of operations per second. Zero or a negative value disables the limit.
+        """
+        self.rate = rate                                       # Максимальное количество операций в секунду
+        self._interval = 1 / rate if rate > 0 else 0.0         # Интервал между соседними операциями (в секундах)
+        self._next_slot = 0.0                                  # Время, когда разрешена следующая операция
+        self._lock = asyncio.Lock()                            # Блокировка для резервирования слотов
+
+    async def acquire(self) -> None:
+        """
+            Waits until the next operation is allowed.
+        """
+        if not self._interval:
+            return
+
+        # Резервируем ближайший свободный слот под блокировкой, а ждем его уже без нее
+        async with self._lock:
+            now = monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
@@ -33,18 +33,19 @@ async def main() -> None:
 
     sorter = EmailSorter()  # Создаем экземпляр класса EmailSorter для сортировки email
 
-    # Собираем список всех файлов, которые нужно обработать, используя шаблоны из конфигурации
-    input_files = []
+    # Собираем множество всех файлов, которые нужно обработать, используя шаблоны из конфигурации (дубликаты от
+    # пересекающихся шаблонов отбрасываются сразу)
+    found_files: set[str] = set()
     for file_pattern in config['input_files']:
-        input_files.extend(glob.glob(file_pattern))
+        found_files.update(glob.iglob(file_pattern))
 
     # Если список файлов пуст, записываем ошибку в лог и выходим
-    if not input_files:
+    if not found_files:
         logger.error("No input files found.")
         return
 
-    # Удаляем дубликаты и сортируем список файлов
-    input_files = sorted(set(input_files))
+    # Сортируем файлы один раз, чтобы порядок обработки был предсказуемым
+    input_files = sorted(found_files)
 
     logger.info(f"Files to process: {input_files}")  # Логируем список файлов для обработки
 
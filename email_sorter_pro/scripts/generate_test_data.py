@@ -1,7 +1,10 @@
 # email_sorter_pro/scripts/generate_test_data.py
 
+import os
 import random
 
+import numpy as np
+
 from src.config.config import get_config
 from src.config.logger_config import logger
 
@@ -29,34 +32,19 @@ domains: list[str] =  [
 ]
 ########################################################################################################################
 
-def generate_email() -> str:
-    """
-        Generates a random valid email.
-
-        Returns:
-            str: The generated email.
-    """
-    name = random.choice(names)                                                     # Выбираем случайное имя из списка
-    domain = random.choice(domains)                                                 # Выбираем случайный домен из списка
-    email_type = random.choice(["simple", "with_dot", "with_underscore", "with_number"])  # Выбираем тип email
-
-    # Если email_type равен "simple", возвращается простой email формата name@domain.
-    if email_type == "simple":
-        return f"{name}@{domain}"  # Простой email формата name@domain
-
-    # Если email_type равен "with_dot", возвращается email, где между именами добавлена точка.
-    elif email_type == "with_dot":
-        return f"{name}.{random.choice(names)}@{domain}"  # email с точкой между именами
-
-    # Если email_type равен "with_underscore", возвращается email, где между именами добавлено подчеркивание.
-    elif email_type == "with_underscore":
-        return f"{name}_{random.choice(names)}@{domain}"  # email с подчеркиванием между именами
-
-    # Если email_type не соответствует ни одному из вышеперечисленных, возвращается email с номером в конце.
-    else:  # with_number
-        return f"{name}{random.randint(1, 9999)}@{domain}"  # email с номером в конце
+# Форматы валидных email: простой, с точкой, с подчеркиванием и с номером в конце
+########################################################################################################################
+EMAIL_FORMATS: list[str] = [
+    "{name}@{domain}",             # simple
+    "{name}.{second}@{domain}",    # with_dot
+    "{name}_{second}@{domain}",    # with_underscore
+    "{name}{number}@{domain}",     # with_number
+]
 ########################################################################################################################
 
+# Размер порции данных для одного системного вызова записи (1 МБ)
+WRITE_CHUNK_SIZE: int = 1 << 20
+
 
 def generate_invalid_email() -> str:
     """
@@ -90,11 +78,84 @@ def generate_invalid_email() -> str:
 ########################################################################################################################
 
 
+def generate_email_rows(count: int) -> list[str]:
+    """
+        Generates a list of random emails (valid and, with a 5% probability, invalid) using the random module.
+
+        Random values are drawn for all rows at once with random.choices.
+
+        Args:
+            count (int): Number of emails to generate.
+
+        Returns:
+            list[str]: The generated emails.
+    """
+    # Выбираем все случайные значения сразу для всего файла
+    is_invalid = random.choices([True, False], weights=[5, 95], k=count)  # 5% шанс генерации невалидного email
+    first_names = random.choices(names, k=count)                           # Первое имя
+    second_names = random.choices(names, k=count)                          # Второе имя (для email с точкой/подчеркиванием)
+    email_domains = random.choices(domains, k=count)                       # Домен
+    email_formats = random.choices(EMAIL_FORMATS, k=count)                 # Тип email
+    numbers = random.choices(range(1, 10000), k=count)                     # Номер (для email с номером в конце)
+
+    # Формируем строки email: невалидные генерируем отдельно, валидные - по выбранному формату
+    return [
+        generate_invalid_email() if invalid else email_format.format(name=name, second=second, domain=domain,
+                                                                     number=number)
+        for invalid, name, second, domain, email_format, number
+        in zip(is_invalid, first_names, second_names, email_domains, email_formats, numbers)
+    ]
+########################################################################################################################
+
+
+def generate_email_rows_numpy(count: int) -> list[str]:
+    """
+        Generates a list of random emails (valid and, with a 5% probability, invalid) using numpy.
+
+        Produces the same distribution as generate_email_rows, but random indexes are drawn and valid emails are
+        assembled with vectorized numpy operations; only the invalid emails are generated in Python.
+
+        Args:
+            count (int): Number of emails to generate.
+
+        Returns:
+            list[str]: The generated emails.
+    """
+    rng = np.random.default_rng()
+    names_array = np.array(names)
+    domains_array = np.array(domains)
+
+    # Выбираем индексы и значения для всех email сразу
+    first_names = names_array[rng.integers(0, len(names), size=count)]            # Первое имя
+    second_names = names_array[rng.integers(0, len(names), size=count)]           # Второе имя
+    email_domains = domains_array[rng.integers(0, len(domains), size=count)]      # Домен
+    numbers = rng.integers(1, 10000, size=count).astype(str)                      # Номер
+    type_ix = rng.integers(0, len(EMAIL_FORMATS), size=count)                     # Тип email (индекс в EMAIL_FORMATS)
+    invalid_mask = rng.random(count) < 0.05                                       # 5% шанс невалидного email
+
+    # Разделитель и окончание локальной части для каждого типа: simple - "", с точкой - ".<имя>",
+    # с подчеркиванием - "_<имя>", с номером - "<номер>"
+    separators = np.array(["", ".", "_", ""])[type_ix]
+    tails = np.select([(type_ix == 1) | (type_ix == 2), type_ix == 3], [second_names, numbers], default="")
+
+    # Собираем email: <имя><разделитель><окончание>@<домен>
+    emails = np.char.add(np.char.add(np.char.add(np.char.add(first_names, separators), tails), "@"), email_domains)
+
+    # Заменяем часть email на невалидные
+    rows = emails.tolist()
+    for index in np.flatnonzero(invalid_mask):
+        rows[index] = generate_invalid_email()
+    return rows
+########################################################################################################################
+
+
 def generate_test_emails() -> None:
     """
         Generates a test file with email addresses based on the configuration.
 
         If specified in the configuration, generates invalid emails with a 5% probability.
+        Large files (at least `numpy_threshold` emails) are generated with numpy, smaller ones with the random module;
+        the result is encoded once and written to a raw file descriptor in WRITE_CHUNK_SIZE chunks.
 
         Raises:
             FileNotFoundError: If the file specified in the configuration is not found.
@@ -105,14 +166,29 @@ def generate_test_emails() -> None:
     filename = test_data_config['file']           # Получаем путь к файлу для записи email
     count = test_data_config['count']             # Получаем количество email для генерации
 
-    # Открываем файл filename для записи ("w"), который затем используем для записи тестовых email-адресов
-    with open(filename, "w") as f:
-        for _ in range(count):
-            if random.random() < 0.05:                                            # 5% шанс генерации невалидного email
-                email = generate_invalid_email()                                  # Генерируем невалидный email
-            else:
-                email = generate_email()                                          # Генерируем валидный email
-            f.write(email + "\n")                                                 # Записываем email в файл
+    # Для большого количества email используем векторизованную генерацию через numpy
+    if count >= test_data_config['numpy_threshold']:
+        rows = generate_email_rows_numpy(count)
+    else:
+        rows = generate_email_rows(count)
+
+    # Кодируем все email в байты один раз (без текстового слоя Python при записи)
+    data = ("\n".join(rows) + "\n").encode('utf-8') if rows else b""
+
+    # Открываем файл filename напрямую через файловый дескриптор (O_BINARY - чтобы Windows не заменял "\n" на "\r\n")
+    fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        # Подсказываем ядру, что запись будет последовательной (только там, где posix_fadvise доступен)
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+        # Записываем данные порциями по WRITE_CHUNK_SIZE без копирования (os.write может записать меньше порции)
+        view = memoryview(data)
+        offset = 0
+        while offset < len(view):
+            offset += os.write(fd, view[offset:offset + WRITE_CHUNK_SIZE])
+    finally:
+        os.close(fd)
 
     logger.info(f"Test file created with {count} email addresses at {filename}")  # Логируем создание файла
 ########################################################################################################################
@@ -1,9 +1,13 @@
 # email_sorter_pro/src/api/country_api.py
 
+import asyncio
+import re
 import ssl
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Optional
 
-from aiohttp import ClientSession
+import diskcache
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
 
 from src.config.config import get_config
 from src.config.logger_config import logger
@@ -12,17 +16,105 @@ from src.config.logger_config import logger
 ssl_context = ssl.create_default_context()
 ssl_context.check_hostname = False
 ssl_context.verify_mode = ssl.CERT_NONE
+# Согласуем протокол через ALPN (aiohttp работает только по HTTP/1.1, поэтому h2 не предлагаем)
+ssl_context.set_alpn_protocols(['http/1.1'])
 
 # Получаем конфигурацию приложения
 config = get_config()
 
-# Кэш для хранения результатов запросов к API
-api_cache: Dict[str, str] = {}
+# Результаты запросов к API по доменам: future создается первым запросом и разделяется всеми остальными
+# (завершенные future служат кэшем, включая неудачные результаты, сохраненные как "OTHER")
+pending: Dict[str, asyncio.Future] = {}
+
+# Семафор, ограничивающий количество одновременных запросов к API
+api_semaphore = asyncio.Semaphore(config['max_concurrent_requests'])
+
+# Части URL API до и после домена (шаблон разбирается один раз при импорте, а не при каждом запросе)
+API_URL_PREFIX, _, API_URL_SUFFIX = config['api_service']['url'].partition('{domain}')
+
+# Таймаут запроса к API
+API_TIMEOUT = ClientTimeout(total=config['api_service']['timeout'])
+
+# Регулярное выражение для извлечения срока жизни ответа из заголовка Cache-Control
+MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+# Национальные доменные зоны, страна для которых определяется локально без запроса к API
+TLD_COUNTRY: Dict[str, str] = {
+    "uk": "UK", "fr": "FR", "de": "DE", "jp": "JP", "ru": "RU", "cn": "CN", "br": "BR", "in": "IN",
+    "us": "US", "ca": "CA", "mx": "MX", "ar": "AR", "es": "ES", "it": "IT", "pt": "PT", "nl": "NL",
+    "be": "BE", "ch": "CH", "at": "AT", "pl": "PL", "cz": "CZ", "se": "SE", "no": "NO", "fi": "FI",
+    "dk": "DK", "ua": "UA", "by": "BY", "kz": "KZ", "tr": "TR", "kr": "KR", "au": "AU", "nz": "NZ",
+}
 
 ########################################################################################################################
-async def get_country_by_domain(domain: str, session: ClientSession) -> str:
+@lru_cache(maxsize=1)
+def get_disk_cache() -> diskcache.Cache:
     """
-        Gets the country from a domain using an API.
+        Opens the persistent on-disk cache of API responses, which is kept between runs (with a size limit).
+
+        The cache is opened on the first API lookup, so its directory is not created when the API is not used.
+
+        :return: On-disk cache of API responses by domain.
+        :rtype: diskcache.Cache
+    """
+    return diskcache.Cache(config['api_service']['cache_dir'], size_limit=config['api_service']['cache_size_limit'])
+########################################################################################################################
+
+
+########################################################################################################################
+def get_cache_ttl(cache_control: Optional[str]) -> Optional[int]:
+    """
+        Determines how long an API response may be cached according to its Cache-Control header.
+
+        :param cache_control: Value of the Cache-Control response header (None if the header is absent).
+        :type cache_control: Optional[str]
+        :return: Lifetime of the cache entry in seconds, or None if the response must not be cached.
+        :rtype: Optional[int]
+    """
+    # Если заголовка нет, используем срок жизни по умолчанию из конфигурации
+    if not cache_control:
+        return config['api_service']['cache_ttl']
+
+    # Ответы с no-store/no-cache не сохраняем
+    directives = cache_control.lower()
+    if 'no-store' in directives or 'no-cache' in directives:
+        return None
+
+    # Если указан max-age, используем его, иначе - срок жизни по умолчанию
+    match = MAX_AGE_RE.search(directives)
+    return int(match.group(1)) if match else config['api_service']['cache_ttl']
+########################################################################################################################
+
+
+########################################################################################################################
+def create_session() -> ClientSession:
+    """
+        Creates an HTTP session for API requests with a bounded, reusable connection pool.
+
+        The connector caps the total and per-host number of connections, caches DNS lookups, applies the shared
+        SSL context and keeps idle connections alive for keepalive_timeout seconds, so requests reuse already
+        established connections instead of repeating TCP and TLS handshakes.
+
+        :return: Asynchronous session for executing HTTP requests.
+        :rtype: aiohttp.ClientSession
+    """
+    api_config = config['api_service']
+    connector = TCPConnector(
+        limit=api_config['connection_limit'],                       # Общий лимит соединений
+        limit_per_host=api_config['connection_limit_per_host'],     # Лимит соединений на один хост
+        ttl_dns_cache=api_config['dns_cache_ttl'],                  # Время жизни DNS-кэша
+        keepalive_timeout=api_config['keepalive_timeout'],          # Время удержания соединений для повторного использования
+        enable_cleanup_closed=True,                                 # Закрываем SSL-соединения, оборванные сервером
+        ssl=ssl_context,                                            # Общий SSL контекст для всех соединений
+    )
+    return ClientSession(connector=connector)
+########################################################################################################################
+
+
+########################################################################################################################
+async def request_country(domain: str, session: ClientSession) -> str:
+    """
+        Determines the country of a domain by its national zone or, failing that, by a request to the API.
 
         :param domain: Domain name to determine the country.
         :type domain: str
@@ -31,26 +123,75 @@ async def get_country_by_domain(domain: str, session: ClientSession) -> str:
         :return: Country code determined by the domain. Returns "OTHER" in case of error.
         :rtype: str
     """
-    # Если домен уже есть в кэше api_cache, возвращаем результат из кэша
-    if domain in api_cache:
-        return api_cache[domain]
+    # Если домен принадлежит национальной зоне, определяем страну локально без запроса к API
+    country = TLD_COUNTRY.get(domain.rsplit('.', 1)[-1].lower())
+    if country:
+        return country
+
+    # Если ответ API для домена сохранен в дисковом кэше и еще не устарел, возвращаем его
+    country = get_disk_cache().get(domain)
+    if country is not None:
+        return country
 
-    api_url = config['api_service']['url'].format(domain=domain)         # Формируем URL для запроса к API
-    timeout = config['api_service']['timeout']                           # Получаем таймаут из конфигурации
+    api_url = API_URL_PREFIX + domain + API_URL_SUFFIX                   # Формируем URL для запроса к API
 
+    country = "OTHER"                                                    # "OTHER", если страна не будет определена
     try:
-        # Выполняем асинхронный HTTP GET запрос к указанному URL (api_url)
-        async with session.get(api_url, timeout=timeout, ssl=ssl_context) as response:
+        # Выполняем асинхронный HTTP GET запрос к указанному URL (api_url), ограничивая число одновременных запросов
+        async with api_semaphore, session.get(api_url, timeout=API_TIMEOUT) as response:
             if response.status == 200:                                   # Если запрос успешен
-                country = await response.text()                          # Получаем текст ответа
-                if country.strip():                                      # Проверяем, что страна не пустая строка
-                    api_cache[domain] = country                          # Кешируем результат запроса
-                    return country                                       # Возвращаем найденную страну
-                else:
-                    return "OTHER"                                       # Возвращаем "OTHER", если страна не определена
-            else:
-                return "OTHER"                                           # Возвращаем "OTHER" в случае ошибки запроса
+                text = await response.text()                             # Получаем текст ответа
+                if text.strip():                                         # Проверяем, что страна не пустая строка
+                    country = text                                       # Запоминаем найденную страну
+
+                # Сохраняем успешный ответ на диск на срок, разрешенный заголовком Cache-Control
+                ttl = get_cache_ttl(response.headers.get('Cache-Control'))
+                if ttl:
+                    get_disk_cache().set(domain, country, expire=ttl)
     except Exception as e:
         logger.error(f"API request failed for domain {domain}: {str(e)}")
-    return "OTHER"                                                       # Возвращаем "OTHER" в случае общей ошибки
+    return country
+########################################################################################################################
+
+
+########################################################################################################################
+async def get_country_by_domain(domain: str, session: ClientSession) -> str:
+    """
+        Gets the country from a domain using an API.
+
+        Concurrent calls for the same domain share a single lookup: the first call creates a future in `pending`
+        and performs the request, later calls await that future. If the call performing the request is cancelled,
+        the waiting calls retry the lookup instead of being cancelled too. Completed futures stay in `pending` and
+        serve as the in-process cache, including "OTHER" results; successful API responses are also kept in
+        the disk cache (get_disk_cache) between runs for as long as their Cache-Control header allows.
+
+        :param domain: Domain name to determine the country.
+        :type domain: str
+        :param session: Asynchronous session for executing HTTP requests.
+        :type session: aiohttp.ClientSession
+        :return: Country code determined by the domain. Returns "OTHER" in case of error.
+        :rtype: str
+    """
+    # Если для домена уже есть запрос (выполняющийся или завершенный), ожидаем его результат
+    while (future := pending.get(domain)) is not None:
+        # shield не дает отмене ожидающей задачи отменить общий запрос
+        country = await asyncio.shield(future)
+        # None означает, что задача, выполнявшая запрос, была отменена: повторяем поиск (и при необходимости запрос)
+        if country is not None:
+            return country
+
+    # Иначе регистрируем future для домена и выполняем запрос сами
+    future = asyncio.get_running_loop().create_future()
+    pending[domain] = future
+    try:
+        country = await request_country(domain, session)
+    except BaseException:
+        # Если запрос прерван, удаляем future, чтобы следующий вызов повторил запрос, и завершаем его значением None,
+        # чтобы ожидающие задачи повторили запрос сами, а не получили чужую отмену
+        del pending[domain]
+        future.set_result(None)
+        raise
+
+    future.set_result(country)
+    return country
 ########################################################################################################################
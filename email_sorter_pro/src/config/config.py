@@ -1,6 +1,7 @@
 # email_sorter_pro/src/config/config.py
 
 import os
+from functools import lru_cache
 from typing import Dict, Any
 
 # Конфигурация стран и доменов
@@ -17,6 +18,15 @@ COUNTRIES: Dict[str, list] = {
     "BR": ["com.br"],                    # Бразилия
     "IN": ["in"]                         # Индия
 }
+
+# Обратный словарь "доменное окончание -> страна", построенный из COUNTRIES один раз при импорте
+# (если окончание указано у нескольких стран, используется первая из них)
+TLD_TO_COUNTRY: Dict[str, str] = {
+    tld: country for country, tlds in reversed(COUNTRIES.items()) for tld in tlds
+}
+
+# Наибольшее количество меток в доменном окончании (например, 2 для "co.uk")
+MAX_TLD_LABELS: int = max((tld.count('.') + 1 for tld in TLD_TO_COUNTRY), default=0)
 ########################################################################################################################
 
 # Конфигурация API-сервиса
@@ -27,6 +37,13 @@ API_SERVICE: Dict[str, Any] = {
     "timeout": 5,                                 # Таймаут для запроса
     "batch_size": 100,                            # Размер пакета для батчевого запроса
     "max_retries": 3,                             # Максимальное количество повторных попыток при неудаче
+    "connection_limit": 64,                       # Максимальное количество одновременных соединений с API
+    "connection_limit_per_host": 16,              # Максимальное количество одновременных соединений с одним хостом
+    "dns_cache_ttl": 300,                         # Время жизни DNS-кэша соединений (в секундах)
+    "keepalive_timeout": 60,                      # Время жизни неиспользуемого соединения в пуле (в секундах)
+    "cache_dir": "cache/country_api",             # Директория дискового кэша ответов API
+    "cache_size_limit": 64 * 1024 * 1024,         # Максимальный размер дискового кэша (64 MB)
+    "cache_ttl": 24 * 60 * 60,                    # Срок жизни ответа в кэше, если API не указал max-age (в секундах)
 }
 ########################################################################################################################
 
@@ -36,6 +53,7 @@ API_SERVICE: Dict[str, Any] = {
 GENERATE_TEST_DATA: bool = False              # Флаг для генерации тестовых данных
 TEST_DATA_COUNT: int = 10000                 # Количество тестовых email
 TEST_FILE: str = 'tests/test_emails.txt'     # Путь к файлу с тестовыми данными
+TEST_DATA_NUMPY_THRESHOLD: int = 1000000     # Начиная с этого количества email генерируются с помощью numpy
 ########################################################################################################################
 
 # Настройки входных файлов
@@ -53,10 +71,13 @@ INPUT_FILES: list = [
 OUTPUT_DIR: str = "output/sorted_emails"  # Директория для сохранения отсортированных email
 USE_API: bool = True                      # Флаг для использования API
 CHUNK_SIZE: int = 10 * 1024 * 1024        # Размер чанка для обработки файлов (10 MB)
+READ_QUEUE_SIZE: int = 4                  # Максимальное количество прочитанных чанков, ожидающих обработки
+MMAP_TILE_SIZE: int = 64 * 1024 * 1024    # Размер окна обработки файла через mmap без API (64 MB)
 MAX_CONCURRENT_REQUESTS: int = 100        # Максимальное количество одновременных запросов к API
-CHUNK_SIZE_EMAILS: int = 10000            # Количество email в одном чанке
-BUFFER_SIZE: int = 8192                   # Размер буфера для записи в файл
-MAX_WORKERS: int = os.cpu_count() * 2     # Количество потоков для обработки (в два раза больше количества CPU)
+BUFFER_SIZE: int = 1024 * 1024            # Размер буфера для записи в файл (1 MB)
+INPUT_READ_BUFFER: int = 1024 * 1024      # Размер буфера для чтения входных файлов (1 MB)
+CHUNK_WORKERS: int = 2                    # Количество задач, параллельно обрабатывающих чанки одного файла
+                                          # (каждая удерживает свой чанк в памяти, пока ждет ответов API)
 ########################################################################################################################
 
 # Настройки состояния и производительности
@@ -70,25 +91,33 @@ MAX_PARALLEL_FILES: int = 4                                  # Максимал
 
 # Функция для получения конфигурации
 ########################################################################################################################
+@lru_cache(maxsize=1)
 def get_config() -> Dict[str, Any]:
     """
         Returns the application configuration.
 
+        The dictionary is built on the first call and the same object is returned afterwards, so it must not be
+        modified by callers.
+
         :return: Dictionary with configuration settings.
         :rtype: dict
 
         Configuration includes the following parameters:
         - countries: configuration of countries and domains
+        - tld_to_country: mapping of domain endings to countries (inverted countries)
+        - max_tld_labels: maximum number of labels in a domain ending
         - api_service: settings for the API service to determine country by domain
         - test_data: settings for generating and using test data
         - input_files: paths to input files for processing
         - output_dir: directory for saving sorted emails
         - use_api: flag for API usage
         - chunk_size: chunk size for file processing (in bytes)
+        - read_queue_size: maximum number of read chunks waiting to be processed
+        - mmap_tile_size: window size for processing memory-mapped files when the API is disabled (in bytes)
         - max_concurrent_requests: maximum number of concurrent API requests
-        - chunk_size_emails: number of emails in each chunk
         - buffer_size: buffer size for file writing (in bytes)
-        - max_workers: number of threads for processing
+        - input_read_buffer: buffer size for reading input files (in bytes)
+        - chunk_workers: number of tasks processing chunks of a file concurrently
         - state_dir: directory for storing state
         - resume_file: file for saving state
         - save_state_interval: interval for saving state (in number of processed emails)
@@ -97,20 +126,25 @@ def get_config() -> Dict[str, Any]:
     """
     return {
         "countries": COUNTRIES,                              # Конфигурация стран и доменов
+        "tld_to_country": TLD_TO_COUNTRY,                    # Доменные окончания и соответствующие им страны
+        "max_tld_labels": MAX_TLD_LABELS,                    # Наибольшее количество меток в доменном окончании
         "api_service": API_SERVICE,                          # Настройки API-сервиса
         "test_data": {                                       # Настройки тестовых данных
             "generate": GENERATE_TEST_DATA,                  # Генерировать ли тестовые данные
             "count": TEST_DATA_COUNT,                        # Количество тестовых email
             "file": TEST_FILE,                               # Путь к файлу с тестовыми данными
+            "numpy_threshold": TEST_DATA_NUMPY_THRESHOLD,    # Количество email, начиная с которого используется numpy
         },
         "input_files": INPUT_FILES,                          # Пути к входным файлам
         "output_dir": OUTPUT_DIR,                            # Директория для сохранения отсортированных email
         "use_api": USE_API,                                  # Использовать ли API для определения страны по домену
         "chunk_size": CHUNK_SIZE,                            # Размер чанка для обработки файлов
+        "read_queue_size": READ_QUEUE_SIZE,                  # Размер очереди прочитанных чанков
+        "mmap_tile_size": MMAP_TILE_SIZE,                    # Размер окна обработки файла через mmap
         "max_concurrent_requests": MAX_CONCURRENT_REQUESTS,  # Максимальное количество одновременных запросов к API
-        "chunk_size_emails": CHUNK_SIZE_EMAILS,              # Количество email в одном чанке
         "buffer_size": BUFFER_SIZE,                          # Размер буфера для записи в файл
-        "max_workers": MAX_WORKERS,                          # Количество потоков для обработки
+        "input_read_buffer": INPUT_READ_BUFFER,              # Размер буфера для чтения входных файлов
+        "chunk_workers": CHUNK_WORKERS,                      # Количество задач, обрабатывающих чанки одного файла
         "state_dir": STATE_DIR,                              # Директория для хранения состояния
         "resume_file": RESUME_FILE,                          # Файл для сохранения состояния
         "save_state_interval": SAVE_STATE_INTERVAL,          # Интервал для сохранения состояния
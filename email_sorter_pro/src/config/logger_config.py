@@ -253,15 +253,16 @@ class CustomLogger:
         logging.warning(f"{message}")
 
     @staticmethod
-    def error(*args) -> None:
+    def error(*args, exc_info: bool = False) -> None:
         """
             Logs an error message.
 
             Args:
                 *args: The messages to log as format string and values.
+                exc_info (bool): Whether to append the current exception traceback. Defaults to False.
         """
         message = " ".join(str(x) for x in args)
-        logging.error(f"{message}")
+        logging.error(f"{message}", exc_info=exc_info)
 
     @staticmethod
     def critical(*args) -> None:
@@ -0,0 +1,65 @@
+# email_sorter_pro/src/sorter/_classify.pyx
+# cython: language_level=3, boundscheck=False, wraparound=False
+
+# Компилируемая версия classify_chunk (собирается pyximport при импорте src.sorter.classify, если установлен Cython).
+# Логика должна совпадать с чистой Python-версией в classify.py.
+
+
+cpdef int classify_chunk(list matches, dict tld_map, int max_labels, dict buckets, list invalid_lines,
+                         dict pending):
+    """
+        Distributes the parsed lines of a chunk into buckets by the countries of their domain endings.
+
+        Args:
+            matches (list): (email, domain, invalid_line) tuples returned by EMAIL_LINE_RE.findall.
+            tld_map (dict): Mapping of domain endings to countries.
+            max_labels (int): Maximum number of labels in a domain ending of tld_map.
+            buckets (dict): Lists of emails by country, filled for domains whose ending is in tld_map.
+            invalid_lines (list): List filled with invalid lines.
+            pending (dict): Lists of emails by lowercased domain, filled for domains whose ending is not in tld_map.
+
+        Returns:
+            int: Number of emails whose country was determined by tld_map.
+    """
+    cdef str email, domain, invalid_line, country
+    cdef list bucket
+    cdef Py_ssize_t start, dot
+    cdef int labels
+    cdef int config_hits = 0
+
+    for email, domain, invalid_line in matches:
+        if invalid_line:
+            invalid_lines.append(invalid_line)
+            continue
+        domain = domain.lower()
+
+        # Находим точку перед самым длинным допустимым окончанием (не более max_labels меток, и перед окончанием
+        # должна остаться хотя бы одна метка), затем проверяем окончания от самого длинного к самому короткому
+        start = -1
+        dot = len(domain)
+        for labels in range(max_labels):
+            dot = domain.rfind('.', 0, dot)
+            if dot < 0:
+                break
+            start = dot
+
+        country = None
+        while start >= 0:
+            country = tld_map.get(domain[start + 1:])
+            if country is not None:
+                break
+            start = domain.find('.', start + 1)
+
+        if country is not None:
+            config_hits += 1
+            bucket = buckets.get(country)
+            if bucket is None:
+                bucket = buckets[country] = []
+            bucket.append(email)
+        else:
+            bucket = pending.get(domain)
+            if bucket is None:
+                bucket = pending[domain] = []
+            bucket.append(email)
+
+    return config_hits
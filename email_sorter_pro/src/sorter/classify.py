@@ -0,0 +1,87 @@
+# email_sorter_pro/src/sorter/classify.py
+
+from typing import Dict, List, Tuple
+
+from src.config.logger_config import logger
+
+
+########################################################################################################################
+def _classify_chunk_py(matches: List[Tuple[str, str, str]], tld_map: Dict[str, str], max_labels: int,
+                       buckets: Dict[str, List[str]], invalid_lines: List[str],
+                       pending: Dict[str, List[str]]) -> int:
+    """
+        Distributes the parsed lines of a chunk into buckets by the countries of their domain endings.
+
+        Pure Python version, used when the Cython version from _classify.pyx cannot be built.
+
+        :param matches: (email, domain, invalid_line) tuples returned by EMAIL_LINE_RE.findall.
+        :type matches: List[Tuple[str, str, str]]
+        :param tld_map: Mapping of domain endings to countries.
+        :type tld_map: Dict[str, str]
+        :param max_labels: Maximum number of labels in a domain ending of tld_map.
+        :type max_labels: int
+        :param buckets: Lists of emails by country, filled for domains whose ending is in tld_map.
+        :type buckets: Dict[str, List[str]]
+        :param invalid_lines: List filled with invalid lines.
+        :type invalid_lines: List[str]
+        :param pending: Lists of emails by lowercased domain, filled for domains whose ending is not in tld_map.
+        :type pending: Dict[str, List[str]]
+        :return: Number of emails whose country was determined by tld_map.
+        :rtype: int
+    """
+    tld_get = tld_map.get
+    config_hits = 0
+
+    for email, domain, invalid_line in matches:
+        if invalid_line:
+            invalid_lines.append(invalid_line)
+            continue
+        domain = domain.lower()
+
+        # Находим точку перед самым длинным допустимым окончанием (не более max_labels меток, и перед окончанием
+        # должна остаться хотя бы одна метка), затем проверяем окончания от самого длинного к самому короткому
+        start = -1
+        dot = len(domain)
+        for _ in range(max_labels):
+            dot = domain.rfind('.', 0, dot)
+            if dot < 0:
+                break
+            start = dot
+
+        country = None
+        while start >= 0:
+            country = tld_get(domain[start + 1:])
+            if country is not None:
+                break
+            start = domain.find('.', start + 1)
+
+        if country is not None:
+            config_hits += 1
+            bucket = buckets.get(country)
+            if bucket is None:
+                bucket = buckets[country] = []
+            bucket.append(email)
+        else:
+            bucket = pending.get(domain)
+            if bucket is None:
+                bucket = pending[domain] = []
+            bucket.append(email)
+
+    return config_hits
+########################################################################################################################
+
+
+# Если установлен Cython, собираем и используем скомпилированную версию classify_chunk, иначе - чистую Python-версию
+try:
+    import pyximport
+
+    importers = pyximport.install(language_level=3)
+    try:
+        from src.sorter import _classify
+    finally:
+        pyximport.uninstall(*importers)
+    classify_chunk = _classify.classify_chunk
+except Exception as e:
+    logger.info(f"Compiled classifier is unavailable, using pure Python: {str(e)}")
+    classify_chunk = _classify_chunk_py
+########################################################################################################################
@@ -2,18 +2,36 @@
 
 import asyncio
 import json
+import mmap
 import os
-import traceback
-from collections import defaultdict
-from typing import List, Optional
+import re
+from collections import Counter
+from typing import Dict, List, Optional, TextIO, Tuple
 
-import aiofiles
 import aiohttp
 from tqdm import tqdm
 
-from src.api.country_api import get_country_by_domain
+from src.api.country_api import create_session, get_country_by_domain
 from src.config.config import get_config
 from src.config.logger_config import logger
+from src.sorter.classify import classify_chunk
+
+# Регулярное выражение для разбора строк чанка целиком (re.M - по одной строке на совпадение, пустые строки
+# пропускаются, пробельные символы по краям отбрасываются). Для строки с единственным '@' и непустым доменом
+# заполняются группы email и домена, для любой другой непустой строки - группа невалидной строки.
+# Строка разбирается как последовательность "слов", разделенных пробельными символами, и только possessive-
+# квантификаторами (Python 3.11+): возвраты невозможны, поэтому время разбора линейно даже для строк с длинными
+# сериями пробелов.
+EMAIL_LINE_RE = re.compile(
+    r'^[^\S\n]*+(?:'
+    r'((?:[^@\s]++(?:[^\S\n]++[^@\s]++)*+)?+[^\S\n]*+@([^\S\n]*+[^@\s]++(?:[^\S\n]++[^@\s]++)*+))'  # email и домен
+    r'|(\S++(?:[^\S\n]++\S++)*+)'                                                                # невалидная строка
+    r')[^\S\n]*+$',
+    re.M
+)
+
+# Разделитель строк в выходных файлах
+NEWLINE = '\n'
 
 
 class EmailSorter:
@@ -22,40 +40,63 @@ class EmailSorter:
 
         Attributes:
             config (dict): Configuration for the sorter.
+            tld_to_country (dict): Mapping of domain endings to countries.
+            max_tld_labels (int): Maximum number of labels in a domain ending from the configuration.
             output_dir (str): Directory to save sorted files.
             use_api (bool): Flag for using API to determine country by email domain.
-            chunk_size (int): Chunk size for processing emails.
+            chunk_size (int): Size of the blocks (in bytes) in which input files are read and processed.
+            read_queue_size (int): Maximum number of read chunks waiting to be processed.
+            mmap_tile_size (int): Size of the windows (in bytes) in which memory-mapped files are processed.
+            chunk_workers (int): Number of tasks processing chunks of a file concurrently.
+            max_parallel_files (int): Maximum number of files processed concurrently.
             max_concurrent_requests (int): Maximum number of concurrent API requests.
-            chunk_size_emails (int): Chunk size for processing emails within files.
             buffer_size (int): Buffer size for file operations.
+            input_read_buffer (int): Buffer size for reading input files.
             file_handlers (dict): Dictionary to store file handlers.
+            writers (dict): Bound write methods of the file handlers by country.
             total_processed (int): Total number of processed emails.
-            email_counts (defaultdict): Counter for emails by country.
+            email_counts (Counter): Counter for emails by country.
             config_usage_count (int): Counter for configuration usage for country determination.
-            api_request_count (int): Counter for API requests for country determination.
+            api_request_count (int): Counter for API requests for country determination (one per unique domain).
+            domain_country_cache (dict): Countries of domains already determined via API.
             state_dir (str): Directory to save sorter state.
             resume_file (str): File to save state for resuming work.
             save_state_interval (int): Interval for saving sorter state.
             progress_bar_update_interval (int): Interval for updating progress bar.
-            invalid_emails (list): List of invalid emails.
-            other_emails (list): List of emails without a determined country.
+            invalid_count (int): Counter for invalid emails.
             invalid_dir (str): Directory to save invalid emails.
             other_dir (str): Directory to save emails without a determined country.
 
         Methods:
-            get_domain(email: str) -> Optional[str]:
-                Returns the domain of the email.
+            resolve_domain(domain: str, session: aiohttp.ClientSession) -> str:
+                Determines the country of a domain via API and caches the result.
 
-            get_file_handler(country: str) -> aiofiles.threadpool.AsyncTextIOWrapper:
+            get_file_handler(country: str) -> TextIO:
                 Retrieves a file handler for the specified country.
 
-            process_email(email: str, session: aiohttp.ClientSession):
-                Processes a single email, determines its country, and saves it to the appropriate file.
+            open_file_handlers():
+                Opens the files of all configured countries, OTHER and INVALID_EMAIL in advance.
 
-            process_chunk(chunk: List[str], session: aiohttp.ClientSession):
-                Asynchronously processes a chunk of emails.
+            read_chunks(input_file: str, queue: asyncio.Queue, consumers: int):
+                Reads a file in blocks of whole lines and puts them into a queue.
 
-            save_state():
+            process_file(input_file: str, session: aiohttp.ClientSession):
+                Processes a file, overlapping reading with processing of already read chunks.
+
+            process_file_mmap(input_file: str, progress_bar: tqdm):
+                Processes a file without API requests by memory-mapping it.
+
+            parse_chunk(chunk: bytes) -> Tuple[dict, dict, list, int]:
+                Parses a chunk of emails and distributes them by the countries available from the configuration.
+
+            write_chunk(parsed: tuple):
+                Writes parsed emails of a chunk to the files of their countries and updates the counters.
+
+            process_chunk(chunk: bytes, session: aiohttp.ClientSession):
+                Asynchronously processes a chunk of emails: determines their countries (requesting the API once per
+                unique unknown domain) and saves them to the appropriate files.
+
+            save_state(with_domain_cache: bool = False):
                 Saves the current state of the sorter to a JSON file.
 
             sort_emails(input_files: List[str]):
@@ -63,9 +104,6 @@ class EmailSorter:
 
             load_state():
                 Loads the last saved state of the sorter.
-
-            write_to_file(directory: str, filename: str, email: str):
-                Asynchronously writes an email to the specified file in the specified directory.
     """
 
     def __init__(self):
@@ -79,21 +117,35 @@ class EmailSorter:
         self.output_dir = self.config['output_dir']  # Директория для сохранения отсортированных файлов
         self.use_api = self.config['use_api']        # Флаг использования API для определения страны по домену email
         self.chunk_size = self.config['chunk_size']  # Размер чанка для обработки email
+        self.read_queue_size = self.config['read_queue_size']  # Размер очереди прочитанных чанков
+        self.mmap_tile_size = self.config['mmap_tile_size']  # Размер окна обработки файла, отображенного в память
+        self.chunk_workers = self.config['chunk_workers']  # Количество задач, параллельно обрабатывающих чанки файла
+        self.max_parallel_files = self.config['max_parallel_files']  # Количество файлов, обрабатываемых параллельно
         self.max_concurrent_requests = self.config[
             'max_concurrent_requests']               # Максимальное количество параллельных запросов к API
-        self.chunk_size_emails = self.config['chunk_size_emails']  # Размер чанка для обработки email внутри файлов
         self.buffer_size = self.config['buffer_size']  # Размер буфера для файловых операций
+        self.input_read_buffer = self.config['input_read_buffer']  # Размер буфера для чтения входных файлов
+
+        # Словарь "доменное окончание -> страна" и наибольшее количество меток в окончании (вычислены при импорте config)
+        self.tld_to_country = self.config['tld_to_country']
+        self.max_tld_labels = self.config['max_tld_labels']
 
         # Словарь для хранения файловых дескрипторов по странам
         self.file_handlers = {}
 
+        # Словарь методов write открытых файлов по странам (без поиска атрибута при каждой записи)
+        self.writers = {}
+
         # Счетчики и счетчики для статистики
         self.total_processed = 0  # Общее количество обработанных email
-        self.email_counts = defaultdict(
-            int)                   # Счетчик email по странам (используется defaultdict с int как значение по умолчанию)
+        self.email_counts = Counter()  # Счетчик email по странам
         self.config_usage_count = 0  # Счетчик использования конфигурации для определения страны
         self.api_request_count = 0   # Счетчик запросов к API для определения страны
 
+        # Кэш стран доменов, определенных через API (каждый домен запрашивается один раз, кэш сохраняется в файле
+        # состояния при остановке из-за ошибки)
+        self.domain_country_cache = {}
+
         # Директория для сохранения состояния работы сортировщика
         self.state_dir = self.config['state_dir']
 
@@ -106,33 +158,40 @@ class EmailSorter:
         # Интервал обновления прогресс-бара
         self.progress_bar_update_interval = self.config['progress_bar_update_interval']
 
-        # Списки для хранения невалидных и прочих email
-        self.invalid_emails = []
-        self.other_emails = []
+        # Счетчик невалидных email (сами email сразу записываются в файл INVALID_EMAIL.txt)
+        self.invalid_count = 0
 
         # Директории для сохранения невалидных и прочих email
         self.invalid_dir = os.path.join(self.output_dir, "INVALID_EMAIL")
         self.other_dir = os.path.join(self.output_dir, "OTHER")
 
-    @staticmethod
-    def get_domain(email: str) -> Optional[str]:
+    async def resolve_domain(self, domain: str, session: aiohttp.ClientSession) -> str:
         """
-            Returns the domain of an email.
+            Determines the country of a domain via API and caches the result.
+
+            The cache is kept for the whole run and saved in the state file, so a domain is requested at most once
+            even when several chunks or files contain it.
 
             Args:
-                email (str): Email from which to extract the domain.
+                domain (str): Domain of an email.
+                session (aiohttp.ClientSession): Session for asynchronous HTTP requests.
 
             Returns:
-                Optional[str]: Domain of the email or None if the email format is incorrect.
+                str: Country returned by the API.
         """
-        # Разделяем строку `email` по символу '@' на части
-        parts = email.split('@')
-
-        # Возвращаем вторую часть (после '@'), приведенную к нижнему регистру, если в parts есть две части, иначе
-        # возвращаем None
-        return parts[1].lower() if len(parts) == 2 else None
-
-    async def get_file_handler(self, country: str) -> aiofiles.threadpool.AsyncTextIOWrapper:
+        # Если страна домена уже известна, возвращаем ее из кэша
+        country = self.domain_country_cache.get(domain)
+        if country is not None:
+            return country
+
+        country = await get_country_by_domain(domain, session)
+        # Если тот же домен одновременно запрашивался другой задачей, запрос учитываем только один раз
+        if domain not in self.domain_country_cache:
+            self.api_request_count += 1                 # Увеличиваем счетчик API запросов
+            self.domain_country_cache[domain] = country  # Запоминаем страну домена
+        return country
+
+    def get_file_handler(self, country: str) -> TextIO:
         """
             Retrieves a file handler for the specified country.
 
@@ -140,7 +199,7 @@ class EmailSorter:
                 country (str): Country.
 
             Returns:
-                aiofiles.threadpool.AsyncTextIOWrapper: Asynchronous file handler.
+                TextIO: Buffered file handler opened for appending.
         """
         # Если еще не открыт файловый объект для заданной страны в словаре
         if country not in self.file_handlers:
@@ -148,93 +207,278 @@ class EmailSorter:
             country_dir = os.path.join(self.output_dir, country)
             # Создаем директорию country_dir, если она не существует
             os.makedirs(country_dir, exist_ok=True)
-            # Открываем файл для записи, используя aiofiles
-            self.file_handlers[country] = await aiofiles.open(os.path.join(country_dir, f"{country}.txt"), mode='a',
-                                                              buffering=self.buffer_size)
+            # Открываем файл для записи с большим буфером: записи накапливаются в памяти и сбрасываются на диск редко
+            self.file_handlers[country] = open(os.path.join(country_dir, f"{country}.txt"), mode='a',
+                                               buffering=self.buffer_size)
+            self.writers[country] = self.file_handlers[country].write
         # Возвращаем открытый файловый объект для данной страны
         return self.file_handlers[country]
 
-    async def process_email(self, email: str, session: aiohttp.ClientSession) -> None:
+    def open_file_handlers(self) -> None:
+        """
+            Opens the files of all configured countries, OTHER and INVALID_EMAIL in advance.
+
+            Files for countries returned only by the API are still opened on first use by get_file_handler.
+
+            Returns:
+                None
+        """
+        for country in (*self.config['countries'], 'OTHER', 'INVALID_EMAIL'):
+            self.get_file_handler(country)
+
+    async def read_chunks(self, input_file: str, queue: asyncio.Queue, consumers: int) -> None:
+        """
+            Reads a file in blocks of whole lines and puts them into a queue.
+
+            Blocks of chunk_size bytes are read in a thread pool, so the event loop keeps processing chunks while the
+            disk is busy; an incomplete last line of a block is carried over to the next one.
+
+            Args:
+                input_file (str): Path to the file to read.
+                queue (asyncio.Queue): Bounded queue of chunks consumed by process_file.
+                consumers (int): Number of consumers, each of which receives a None stop marker at the end of the file.
+
+            Returns:
+                None
         """
-            Processes an email: determines the country and saves it to the appropriate file.
+        loop = asyncio.get_running_loop()
+        tail = b""  # Неполная последняя строка предыдущего блока
+
+        with open(input_file, mode='rb', buffering=self.input_read_buffer) as file:
+            # Читаем файл блоками в пуле потоков, пока не дойдем до конца файла
+            while block := await loop.run_in_executor(None, file.read, self.chunk_size):
+                # Отправляем в очередь только целые строки, а неполную последнюю строку оставляем для следующего блока
+                cut = block.rfind(b"\n") + 1
+                if cut:
+                    await queue.put(tail + block[:cut])
+                    tail = block[cut:]
+                else:
+                    tail += block
+
+        # Отправляем последнюю строку файла, если она не заканчивается переводом строки
+        if tail:
+            await queue.put(tail)
+
+        # Сообщаем каждому обработчику, что файл прочитан
+        for _ in range(consumers):
+            await queue.put(None)
+
+    def process_file_mmap(self, input_file: str, progress_bar: tqdm) -> None:
+        """
+            Processes a file without API requests by memory-mapping it and classifying it in windows of whole lines.
+
+            Used when the API is disabled: classification is pure CPU work, so the file is processed synchronously
+            without read calls, a thread pool or a queue.
 
             Args:
-                email (str): Email to process.
+                input_file (str): Path to the file containing emails to process.
+                progress_bar (tqdm): Progress bar of the file (in bytes).
+
+            Returns:
+                None
+        """
+        with open(input_file, mode='rb') as file:
+            file_size = os.fstat(file.fileno()).st_size
+            # Пустой файл нельзя отобразить в память
+            if not file_size:
+                return
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offset = 0
+                while offset < file_size:
+                    # Окно заканчивается на последнем переводе строки внутри mmap_tile_size байт, чтобы не разрезать
+                    # строку; если строка длиннее окна, окно продлевается до ее конца
+                    end = min(offset + self.mmap_tile_size, file_size)
+                    if end < file_size:
+                        newline = mm.rfind(b"\n", offset, end)
+                        if newline < 0:
+                            newline = mm.find(b"\n", end)
+                        end = newline + 1 if newline >= 0 else file_size
+
+                    self.write_chunk(self.parse_chunk(mm[offset:end]))
+                    progress_bar.update(end - offset)
+                    offset = end
+
+    async def process_file(self, input_file: str, session: aiohttp.ClientSession) -> None:
+        """
+            Processes a file, overlapping reading with processing of already read chunks.
+
+            A reader task fills a bounded queue (read_queue_size chunks) and chunk_workers tasks process the chunks from
+            it, so disk reads overlap with API requests. If the API is disabled, the file is processed synchronously by
+            process_file_mmap.
+
+            Args:
+                input_file (str): Path to the file containing emails to process.
                 session (aiohttp.ClientSession): Session for asynchronous HTTP requests.
 
             Returns:
                 None
         """
+        # Получаем размер текущего файла
+        file_size = os.path.getsize(input_file)
+        # Инициализируем прогресс-бар для отображения процесса обработки файла
+        progress_bar = tqdm(total=file_size, unit='B', unit_scale=True, desc=f"Processing {input_file}")
+
+        # Без API страна определяется только по конфигурации: обрабатываем файл напрямую через mmap
+        if not self.use_api:
+            try:
+                self.process_file_mmap(input_file, progress_bar)
+            finally:
+                progress_bar.close()
+            return
+
+        # Ограниченная очередь прочитанных чанков: если обработка отстает, чтение приостанавливается
+        queue: asyncio.Queue[Optional[bytes]] = asyncio.Queue(maxsize=self.read_queue_size)
+
+        async def consume() -> None:
+            """
+                Processes chunks from the queue until a stop marker is received.
+            """
+            while (chunk := await queue.get()) is not None:
+                await self.process_chunk(chunk, session)
+                # Обновляем прогресс-бар один раз на chunk
+                progress_bar.update(len(chunk))
+
+        reader = asyncio.create_task(self.read_chunks(input_file, queue, self.chunk_workers))
+        consumers = [asyncio.create_task(consume()) for _ in range(self.chunk_workers)]
         try:
-            # Получаем домен email
-            domain = self.get_domain(email)
-            # Если домен пустой или None
-            if not domain:
-                logger.warning(f"Invalid email format: {email}")
-                self.invalid_emails.append(email)  # Добавляем email в список невалидных
-                return
+            await asyncio.gather(reader, *consumers)
+        finally:
+            # Если одна из задач завершилась ошибкой, останавливаем остальные, чтобы они не ждали бесконечно
+            for task in (reader, *consumers):
+                task.cancel()
+            await asyncio.gather(reader, *consumers, return_exceptions=True)
+            # Закрываем прогресс-бар после обработки файла
+            progress_bar.close()
+
+    def parse_chunk(self, chunk: bytes) -> Tuple[Dict[str, List[str]], Dict[str, List[str]], List[str], int]:
+        """
+            Parses a chunk of emails and distributes them by the countries available from the configuration.
 
-            # Инициализируем переменную country значением None перед тем, как начать определять страну, связанную с
-            # email-адресом.
-            country = None
-
-            # Проходим по элементам словаря self.config['countries'], где c - это ключ (название страны),
-            # а domains - список доменных окончаний, связанных с этой страной.
-            for c, domains in self.config['countries'].items():
-                # Проверяем, оканчивается ли домен email на один из заданных для страны доменов
-                if any(domain.endswith(f".{d}") for d in domains):
-                    country = c                   # Если условие выполняется, устанавливаем страну
-                    self.config_usage_count += 1  # Увеличиваем счетчик использования конфигурации
-                    # После того, как была найдена соответствующая страна для доменного окончания email прерываем цикл
-                    break
-
-            # Если страна не определена и используется API, получаем страну через API
-            if not country and self.use_api:
-                country = await get_country_by_domain(domain, session)
-                self.api_request_count += 1  # Увеличиваем счетчик API запросов
+            The per-email loop is performed by classify_chunk (compiled with Cython if it is available).
 
-            # Если страна не определена или равна "Undefined" или пустая строка, помечаем как "OTHER"
-            if not country or country == "Undefined" or country.strip() == "":
-                country = 'OTHER'
-                self.other_emails.append(email)  # Добавляем email в список "OTHER"
+            Args:
+                chunk (bytes): Block of whole lines of an input file (UTF-8 encoded emails).
 
-            file_handler = await self.get_file_handler(country)  # Получаем файловый обработчик для данной страны
-            await file_handler.write(f"{email}\n")               # Записываем email в соответствующий файл
-            self.email_counts[country] += 1                      # Увеличиваем счетчик email для данной страны
-            self.total_processed += 1                            # Увеличиваем общий счетчик обработанных email
+            Returns:
+                Tuple[Dict[str, List[str]], Dict[str, List[str]], List[str], int]: Emails by country determined from
+                    the configuration, emails by domain whose country is not configured, invalid lines and the number
+                    of emails whose country was determined from the configuration.
+        """
+        # Декодируем чанк целиком (некорректные байты заменяются) и разбираем все строки одним проходом регулярного
+        # выражения: для каждой непустой строки получаем email и домен или невалидную строку
+        text = chunk.decode('utf-8', 'replace')
 
-            # Сохраняем состояние после каждого заданного интервала обработки
-            if self.total_processed % self.save_state_interval == 0:
-                await self.save_state()
+        # Распределяем email по странам из конфигурации, а email с доменами, окончания которых нет в конфигурации,
+        # группируем по доменам
+        buckets = {}
+        pending = {}
+        invalid_lines = []
+        config_hits = classify_chunk(EMAIL_LINE_RE.findall(text), self.tld_to_country, self.max_tld_labels, buckets,
+                                     invalid_lines, pending)
 
-        except Exception as e:
-            detailed_error_message = traceback.format_exc()
-            logger.error(f"Error processing email {email}: {str(e)}\n{detailed_error_message}")
-            self.invalid_emails.append(email)  # Добавляем email в список невалидных
+        return buckets, pending, invalid_lines, config_hits
 
-    async def process_chunk(self, chunk: List[str], session: aiohttp.ClientSession) -> None:
+    def write_chunk(self, parsed: Tuple[Dict[str, List[str]], Dict[str, List[str]], List[str], int]) -> None:
         """
-            Asynchronously processes a chunk of emails.
+            Writes parsed emails of a chunk to the files of their countries and updates the counters.
+
+            Countries of domains that are not configured are taken from domain_country_cache, so the API must already
+            have been queried for them.
+
+            Args:
+                parsed (Tuple[Dict[str, List[str]], Dict[str, List[str]], List[str], int]): Result of parse_chunk.
+
+            Returns:
+                None
+        """
+        buckets, pending, invalid_lines, config_hits = parsed
+        domain_country_cache = self.domain_country_cache
+        use_api = self.use_api
+        save_state_interval = self.save_state_interval
+
+        # Добавляем email доменов, которых нет в конфигурации, к странам, полученным через API (страна определяется
+        # один раз на домен, запросов к API здесь нет)
+        for domain, lines in pending.items():
+            country = domain_country_cache.get(domain) if use_api else None
+
+            # Если страна не определена или равна "Undefined" или пустая строка, помечаем как "OTHER"
+            if not country or country == "Undefined" or country.strip() == "":
+                country = 'OTHER'
+
+            bucket = buckets.get(country)
+            if bucket is None:
+                buckets[country] = lines
+            else:
+                bucket.extend(lines)
+
+        for line in invalid_lines:
+            logger.warning(f"Invalid email format: {line}")
+
+        # Записываем email каждой страны в ее файл (файл страны, которой нет в конфигурации, открывается при первом
+        # обращении) и невалидные email в файл INVALID_EMAIL: строки чанка соединяются переводами строки одним join, а
+        # завершающий перевод строки дописывается отдельной записью, без конкатенации для каждого email
+        writers = self.writers
+        for country, lines in buckets.items():
+            write = writers.get(country) or self.get_file_handler(country).write
+            write(NEWLINE.join(lines))
+            write(NEWLINE)
+        if invalid_lines:
+            write = writers.get('INVALID_EMAIL') or self.get_file_handler('INVALID_EMAIL').write
+            write(NEWLINE.join(invalid_lines))
+            write(NEWLINE)
+
+        # Добавляем счетчики чанка к общим счетчикам
+        chunk_counts = {country: len(lines) for country, lines in buckets.items()}
+        processed_before = self.total_processed
+        self.email_counts.update(chunk_counts)
+        self.total_processed += sum(chunk_counts.values())
+        self.config_usage_count += config_hits
+        self.invalid_count += len(invalid_lines)
+
+        # Сохраняем состояние, если за этот чанк была пройдена очередная граница интервала сохранения
+        if self.total_processed // save_state_interval > processed_before // save_state_interval:
+            self.save_state()
+
+    async def process_chunk(self, chunk: bytes, session: aiohttp.ClientSession) -> None:
+        """
+            Asynchronously processes a chunk of emails: determines the country of each email and saves it to the
+            appropriate file.
+
+            Unknown domains of the chunk are first resolved via API, one request per unique domain, and then the
+            emails are written grouped by country.
 
             Args:
-                chunk (List[str]): List of emails to process.
+                chunk (bytes): Block of whole lines of an input file (UTF-8 encoded emails) to process.
                 session (aiohttp.ClientSession): Session for asynchronous HTTP requests.
 
             Returns:
                 None
         """
-        # Создаем список задач (coroutines), каждая из которых вызывает метод self.process_email для каждого email в
-        # чанке (списке строк), который не пустой после удаления начальных и конечных пробельных символов.
-        tasks = [self.process_email(email.strip(), session) for email in chunk if email.strip()]
+        parsed = self.parse_chunk(chunk)
 
-        # Выполняем все задачи одновременно с помощью функции asyncio.gather.
-        await asyncio.gather(*tasks)
+        # Запрашиваем страны доменов, которых нет ни в конфигурации, ни в кэше, у API параллельно, по одному запросу на
+        # домен (число одновременных запросов ограничено семафором в country_api)
+        domain_country_cache = self.domain_country_cache
+        unknown_domains = [domain for domain in parsed[1] if domain not in domain_country_cache]
+        if unknown_domains:
+            await asyncio.gather(*(self.resolve_domain(domain, session) for domain in unknown_domains))
 
-    async def save_state(self) -> None:
+        self.write_chunk(parsed)
+
+    def save_state(self, with_domain_cache: bool = False) -> None:
         """
             Saves the current state of the sorter to a JSON file.
             Creates a JSON file in the state_dir directory.
 
+            Periodic checkpoints save only the counters, so their size does not grow during the run; the countries of
+            domains resolved via API are added only when the sorter stops on an error (successful API responses are
+            also kept in the API disk cache). The file is written to a temporary file first and then atomically
+            replaces the previous state.
+
+            Args:
+                with_domain_cache (bool): Whether to save domain_country_cache as well. Defaults to False.
+
             Returns:
                 None
         """
@@ -247,17 +491,20 @@ class EmailSorter:
             "email_counts": dict(self.email_counts),
             "config_usage_count": self.config_usage_count,
             "api_request_count": self.api_request_count,
-            "invalid_emails": self.invalid_emails,
-            "other_emails": self.other_emails,
+            "invalid_count": self.invalid_count,
         }
+        if with_domain_cache:
+            state["domain_cache"] = self.domain_country_cache
 
         # Определяем путь к файлу состояния state.json в директории state_dir.
         state_file = os.path.join(self.state_dir, "state.json")
 
-        # Асинхронно открываем файл state.json для записи.
-        async with aiofiles.open(os.path.join(self.state_dir, "state.json"), mode='w') as f:
-            # Записываем JSON-представление словаря state в файл.
-            await f.write(json.dumps(state))
+        # Записываем JSON-представление словаря state во временный файл, а затем атомарно заменяем им файл состояния,
+        # чтобы прерванная запись не оставила поврежденное состояние.
+        tmp_file = f"{state_file}.tmp"
+        with open(tmp_file, mode='w') as f:
+            f.write(json.dumps(state))
+        os.replace(tmp_file, state_file)
 
         # Логируем информацию о сохранении состояния в лог-файл.
         logger.info(f"Saved state to {state_file}")
@@ -266,6 +513,8 @@ class EmailSorter:
         """
             Sorts emails from the specified files, processing them concurrently using asyncio.
 
+            Up to max_parallel_files files are processed at the same time.
+
             Args:
                 input_files (List[str]): List of paths to files containing emails to process.
 
@@ -278,52 +527,46 @@ class EmailSorter:
             os.makedirs(self.invalid_dir, exist_ok=True)
             os.makedirs(self.other_dir, exist_ok=True)
 
+            # Заранее открываем файлы всех известных стран, OTHER и INVALID_EMAIL
+            self.open_file_handlers()
+
             # Загружаем последнее сохраненное состояние
-            await self.load_state()
-
-            # Создаем асинхронную сессию для работы с HTTP запросами
-            async with aiohttp.ClientSession() as session:
-                # Обрабатываем каждый входной файл из списка
-                for input_file in input_files:
-                    # Получаем размер текущего файла
-                    file_size = os.path.getsize(input_file)
-                    # Инициализируем прогресс-бар для отображения процесса обработки файла
-                    progress_bar = tqdm(total=file_size, unit='B', unit_scale=True, desc=f"Processing {input_file}")
-
-                    # Открываем файл для чтения асинхронно
-                    async with aiofiles.open(input_file, mode='r') as file:
-                        chunk = []
-                        # Читаем файл построчно
-                        async for line in file:
-                            chunk.append(line)
-                            # Если собрали достаточно строк для обработки в одном chunk, запускаем обработку
-                            if len(chunk) >= self.chunk_size_emails:
-                                await self.process_chunk(chunk, session)
-                                chunk = []
-                            # Обновляем прогресс-бар на основе количества байт в текущей строке
-                            progress_bar.update(len(line.encode('utf-8')))
-
-                        # Обработка оставшихся строк, если chunk не пустой после завершения цикла
-                        if chunk:
-                            await self.process_chunk(chunk, session)
-
-                    # Закрываем прогресс-бар после обработки файла
-                    progress_bar.close()
+            self.load_state()
+
+            # Создаем асинхронную сессию с пулом соединений для работы с HTTP запросами
+            async with create_session() as session:
+                # Семафор, ограничивающий количество файлов, обрабатываемых одновременно
+                semaphore = asyncio.Semaphore(self.max_parallel_files)
+
+                async def process_file_limited(input_file: str) -> None:
+                    """
+                        Processes a file as soon as one of the max_parallel_files slots is free.
+
+                        Args:
+                            input_file (str): Path to the file containing emails to process.
+                    """
+                    async with semaphore:
+                        await self.process_file(input_file, session)
+
+                # Обрабатываем входные файлы параллельно (запись в файлы стран синхронная и не прерывается await, поэтому
+                # строки разных файлов не перемешиваются)
+                tasks = [asyncio.create_task(process_file_limited(input_file)) for input_file in input_files]
+                try:
+                    await asyncio.gather(*tasks)
+                finally:
+                    # Если обработка одного из файлов завершилась ошибкой, останавливаем остальные
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
 
             # Закрываем все открытые файловые дескрипторы
             for handler in self.file_handlers.values():
-                await handler.close()
+                handler.close()
+            self.file_handlers.clear()
+            self.writers.clear()
 
             # Сохраняем текущее состояние объекта
-            await self.save_state()
-
-            # Записываем невалидные email в файлы INVALID_EMAIL.txt
-            for email in self.invalid_emails:
-                await self.write_to_file(self.invalid_dir, "INVALID_EMAIL.txt", email)
-
-            # Записываем прочие email в файлы OTHER.txt
-            for email in self.other_emails:
-                await self.write_to_file(self.other_dir, "OTHER.txt", email)
+            self.save_state()
 
             # Удаляем файл состояния после успешной обработки всех файлов
             os.remove(self.resume_file)
@@ -333,7 +576,7 @@ class EmailSorter:
                 logger.info(f"Emails written to {country}.txt: {count}")
 
             # Логируем количество невалидных email
-            logger.info(f"Invalid emails: {len(self.invalid_emails)}")
+            logger.info(f"Invalid emails: {self.invalid_count}")
 
             # Логируем общее количество обработанных email
             logger.info(f"Total processed emails: {self.total_processed}")
@@ -345,13 +588,13 @@ class EmailSorter:
             logger.info(f"API request count: {self.api_request_count}")
 
         except Exception as e:
-            detailed_error_message = traceback.format_exc()
-            logger.error(f"Error during email sorting: {str(e)}\n{detailed_error_message}")
+            # Трейсбэк форматируется обработчиком логов при выводе записи
+            logger.error(f"Error during email sorting: {str(e)}", exc_info=True)
 
-            # Сохраняем текущее состояние объекта в случае ошибки
-            await self.save_state()
+            # Сохраняем текущее состояние объекта в случае ошибки вместе с кэшем стран доменов для продолжения работы
+            self.save_state(with_domain_cache=True)
 
-    async def load_state(self) -> None:
+    def load_state(self) -> None:
         """
             Loads the last saved state of the sorter from a JSON file.
 
@@ -359,45 +602,19 @@ class EmailSorter:
                 None
         """
         try:
-            # Пытаемся асинхронно открыть файл состояния на чтение
-            async with aiofiles.open(self.resume_file, mode='r') as f:
+            # Пытаемся открыть файл состояния на чтение
+            with open(self.resume_file, mode='r') as f:
                 # Читаем содержимое файла и загружаем состояние в переменные
-                state = json.loads(await f.read())
+                state = json.load(f)
                 self.total_processed = state["total_processed"]
-                self.email_counts = defaultdict(int, state["email_counts"])
+                self.email_counts = Counter(state["email_counts"])
                 self.config_usage_count = state["config_usage_count"]
                 self.api_request_count = state["api_request_count"]
-                self.invalid_emails = state.get("invalid_emails", [])
-                self.other_emails = state.get("other_emails", [])
+                self.invalid_count = state.get("invalid_count", 0)
+                self.domain_country_cache = state.get("domain_cache", {})
             # Логируем сообщение о успешном возобновлении работы с сохраненным состоянием
             logger.info(f"Resumed from previous state. Total processed: {self.total_processed}")
 
         except FileNotFoundError:
             # Если файл состояния не найден, логируем сообщение о начале работы с чистого листа
             logger.info("No resume state found. Starting from the beginning.")
-
-    @staticmethod
-    async def write_to_file(directory: str, filename: str, email: str) -> None:
-        """
-            Asynchronously writes an email to the specified file in the specified directory.
-
-            Args:
-                directory (str): Directory to save the file.
-                filename (str): File name for writing.
-                email (str): Email to write to the file.
-
-            Returns:
-                None
-        """
-        try:
-            # Асинхронно открываем указанный файл в указанной директории для дозаписи ('a').
-            async with aiofiles.open(os.path.join(directory, filename), mode='a') as f:
-                # Записываем переданный email в файл с добавлением символа новой строки.
-                await f.write(f"{email}\n")
-        except Exception as e:
-            detailed_error_message = traceback.format_exc()
-            error_message = (f"Error writing email to file {filename} in directory {directory}: "
-                             f"{str(e)}\n{detailed_error_message}")
-            logger.error(error_message)
-
-
@@ -0,0 +1,50 @@
+# email_sorter_pro/tests/test_email_line_re.py
+
+import time
+import unittest
+
+from src.sorter.email_sorter import EMAIL_LINE_RE
+
+
+class EmailLineReTest(unittest.TestCase):
+    """
+        Tests for the regular expression that parses chunks of input lines.
+    """
+
+    def test_parses_valid_invalid_and_empty_lines(self):
+        """
+            Valid emails give email and domain groups, other non-empty lines give the invalid line group, empty lines
+            are skipped and surrounding whitespace is stripped.
+        """
+        text = "  john@Mail.RU \r\n\nno_at\na@b@c.com\n\t \nx@\n@host.de\nsp ace@do main.fr"
+        self.assertEqual(EMAIL_LINE_RE.findall(text), [
+            ("john@Mail.RU", "Mail.RU", ""),
+            ("", "", "no_at"),
+            ("", "", "a@b@c.com"),
+            ("", "", "x@"),
+            ("@host.de", "host.de", ""),
+            ("sp ace@do main.fr", "do main.fr", ""),
+        ])
+
+    def test_long_interior_whitespace_is_parsed_in_linear_time(self):
+        """
+            Lines with a long run of inner whitespace (and a whitespace-only line) are parsed without backtracking.
+        """
+        n = 1000000
+        text = "\n".join(["a" + " " * n + "b", "x@b" + " " * n + "@", " " * n, "ok@mail.de"])
+
+        started = time.perf_counter()
+        matches = EMAIL_LINE_RE.findall(text)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(matches, [
+            ("", "", "a" + " " * n + "b"),
+            ("", "", "x@b" + " " * n + "@"),
+            ("ok@mail.de", "mail.de", ""),
+        ])
+        # Квадратичный разбор таких строк занимал бы часы
+        self.assertLess(elapsed, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()